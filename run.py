@@ -2,8 +2,9 @@
 import uvicorn
 #internal
 from watchdog.data.web_app_config import WebAppConfig
+from watchdog.data.uvicorn_config import UvicornConfig
 
 if __name__ == "__main__":
     config = WebAppConfig()
-    uvicorn_args = config.model_dump(exclude={"oidc"})
+    uvicorn_args = config.model_dump(include=set(UvicornConfig.model_fields))
     uvicorn.run("watchdog.app:app", **uvicorn_args)
@@ -0,0 +1,29 @@
+#builtin
+import asyncio, logging, signal, sys
+#internal
+from watchdog.data.agent_config import AgentConfig
+from watchdog.agent import Agent
+
+async def main(config: AgentConfig) -> None:
+    agent = Agent(config)
+    loop = asyncio.get_running_loop()
+    try:
+        # service managers stop the agent with SIGTERM, shut down cleanly so the scheduler snapshot is written
+        loop.add_signal_handler(signal.SIGTERM, agent.stop)
+        # kill -USR1 <pid> profiles the probe loop of a running agent
+        loop.add_signal_handler(signal.SIGUSR1, agent.profile)
+    except (NotImplementedError, AttributeError):  # no signal handlers in the event loop and no SIGUSR1 on Windows
+        pass
+    await agent.run()
+
+if __name__ == "__main__":
+    config = AgentConfig()
+    logging.basicConfig(
+        level=config.log_level.upper(),
+        format="%(asctime)s [%(levelname)s] %(name)s: %(message)s"
+    )
+    try:
+        asyncio.run(main(config))
+    except RuntimeError as e:  # e.g. another agent with the same agent_id runs on this host
+        logging.error(e)
+        sys.exit(1)
@@ -0,0 +1,16 @@
+#builtin
+import asyncio, logging
+#internal
+from watchdog.data.load_test_config import LoadTestConfig
+from watchdog.load_test import LoadTest
+
+if __name__ == "__main__":
+    # settings can be given as WATCHDOG_LOAD_TEST_* env vars or as cli args, e.g. --workers 4 --concurrency 50
+    config = LoadTestConfig(_cli_parse_args=True)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(name)s: %(message)s")
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    stats = asyncio.run(LoadTest(config).run())
+
+    print(f"{'route':<16}{'requests':>10}{'errors':>8}{'req/s':>10}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for s in stats:
+        print(f"{s.route:<16}{s.requests:>10}{s.errors:>8}{s.throughput:>10.1f}{s.p50_ms:>10.1f}{s.p90_ms:>10.1f}{s.p99_ms:>10.1f}{s.max_ms:>10.1f}")
@@ -0,0 +1,210 @@
+# builtin
+from contextlib import ExitStack
+from typing import Dict, List
+import asyncio, gzip, logging, os, time
+# 3rd party
+import httpx
+# local
+from .atomic_file import file_lock, write_atomic
+from .functor import Functor
+from .sampling_profiler import SamplingProfiler
+from .scheduler import Scheduler
+from .watchdog import Watchdog
+from .data.agent_config import AgentConfig
+from .data.heartbeat import Heartbeat
+from .data.lease import Lease
+from .data.lease_request import LeaseRequest
+from .data.probe_result import ProbeResult
+from .data.probe_result_batch import ProbeResultBatch
+
+class Agent(Functor[None]):
+    """Remote probe agent: leases watchdogs from the app, keeps the leases alive with heartbeats
+    and reports probe results back in gzip compressed batches."""
+
+    def __init__(self, config: AgentConfig):
+        self._config = config
+        self._leases: Dict[str, Lease] = {}
+        self._stopped = asyncio.Event()
+        self._client: httpx.AsyncClient = None
+        self._scheduler = Scheduler(config.interval_seconds, config.ramp_up_seconds, config.max_backoff_level,
+                                    config.schedule_retention_seconds)
+        self._next_lease = 0.0
+        self._next_snapshot = 0.0
+        self._snapshot_file = config.snapshot_file.format(agent_id=config.agent_id) if config.snapshot_file else None
+        self._profiler = SamplingProfiler()
+        self._profile_task: asyncio.Task = None
+
+    def leases(self) -> List[Lease]:
+        return list(self._leases.values())
+
+    def stop(self) -> None:
+        self._stopped.set()
+
+    def scheduler(self) -> Scheduler:
+        return self._scheduler
+
+    def profile(self) -> None:
+        """Profiles the agent for profile_seconds in the background, the collapsed stacks are written to profile_dir.
+        Has to be called from the event loop, e.g. by a signal handler."""
+        if self._profiler.busy():
+            logging.warning(f"Agent {self._config.agent_id}: a profile is already running")
+            return
+        self._profile_task = asyncio.get_running_loop().create_task(self._profile())
+
+    async def _profile(self) -> None:
+        seconds = self._config.profile_seconds
+        logging.info(f"Agent {self._config.agent_id}: profiling for {seconds}s")
+        try:
+            collapsed = await asyncio.to_thread(self._profiler.profile, seconds)
+        except RuntimeError as e:
+            logging.warning(f"Agent {self._config.agent_id}: {e}")
+            return
+        path = os.path.join(self._config.profile_dir, f"profile-{self._config.agent_id}-{int(time.time())}.collapsed")
+        try:
+            os.makedirs(self._config.profile_dir, exist_ok=True)
+            write_atomic(path, collapsed.encode())
+        except OSError as e:
+            logging.warning(f"Agent {self._config.agent_id}: could not write profile: {e}")
+            return
+        logging.info(f"Agent {self._config.agent_id}: wrote profile {path}")
+
+    def _names(self) -> List[str]:
+        return [watchdog.name for lease in self._leases.values() for watchdog in lease.watchdogs]
+
+    def _snapshot(self) -> None:
+        snapshot_file = self._snapshot_file
+        if not snapshot_file:
+            return
+        try:
+            os.makedirs(os.path.dirname(snapshot_file) or ".", exist_ok=True)
+            self._scheduler.snapshot(snapshot_file)
+        except OSError as e:
+            logging.warning(f"Agent {self._config.agent_id}: could not write scheduler snapshot: {e}")
+        self._next_snapshot = time.monotonic() + self._config.snapshot_interval_seconds
+
+    async def run(self) -> None:
+        if not self._snapshot_file:
+            await self._run()
+            return
+        # held while the agent runs, a second agent with the same id on this host would share the snapshot and leases
+        os.makedirs(os.path.dirname(self._snapshot_file) or ".", exist_ok=True)
+        with ExitStack() as stack:
+            try:
+                stack.enter_context(file_lock(f"{self._snapshot_file}.lock", blocking=False))
+            except BlockingIOError:
+                raise RuntimeError(f"Agent {self._config.agent_id}: {self._snapshot_file} is used by another agent, "
+                                   "give agents on one host distinct agent ids") from None
+            self._scheduler.restore(self._snapshot_file)
+            await self._run()
+
+    async def _run(self) -> None:
+        self._next_snapshot = time.monotonic() + self._config.snapshot_interval_seconds
+        headers = {"Authorization": f"Bearer {self._config.token}"}
+        async with httpx.AsyncClient(base_url=self._config.server_url, headers=headers, timeout=10.0) as client:
+            self._client = client
+            heartbeat_task = asyncio.create_task(self._heartbeat_loop())
+            try:
+                while not self._stopped.is_set():
+                    try:
+                        await self._tick()
+                    except httpx.HTTPError as e:
+                        logging.warning(f"Agent {self._config.agent_id}: request to app failed: {e}")
+                    if time.monotonic() >= self._next_snapshot:
+                        self._snapshot()
+                    await self._wait(self._idle_seconds())
+            finally:
+                # the heartbeat loop must be done before the client goes away
+                heartbeat_task.cancel()
+                try:
+                    await heartbeat_task
+                except asyncio.CancelledError:
+                    pass
+                self._client = None
+                self._snapshot()
+
+    def _idle_seconds(self) -> float:
+        # wake up for the next due probe, but at least every interval to ask for more work
+        next_due = self._scheduler.next_due(self._names())
+        if next_due is None:
+            return self._config.interval_seconds
+        return min(max(next_due - time.time(), 0.1), self._config.interval_seconds)
+
+    async def _wait(self, seconds: float) -> None:
+        try:
+            await asyncio.wait_for(self._stopped.wait(), timeout=seconds)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _post(self, path: str, body: bytes) -> httpx.Response:
+        headers = {"Content-Type": "application/json", "Content-Encoding": "gzip"}
+        return await self._client.post(path, content=gzip.compress(body), headers=headers)
+
+    async def _tick(self) -> None:
+        leased = sum(len(lease.watchdogs) for lease in self._leases.values())
+        if leased < self._config.max_watchdogs and time.monotonic() >= self._next_lease:
+            self._next_lease = time.monotonic() + self._config.interval_seconds
+            request = LeaseRequest(agent_id=self._config.agent_id, max_watchdogs=self._config.max_watchdogs - leased)
+            resp = await self._post("/agent/lease", request.model_dump_json().encode())
+            resp.raise_for_status()
+            lease = Lease.model_validate_json(resp.content)
+            if lease.watchdogs:
+                logging.info(f"Agent {self._config.agent_id}: leased {len(lease.watchdogs)} watchdogs")
+                self._leases[lease.lease_id] = lease
+        self._scheduler.sync(self._names())
+        due = set(self._scheduler.due(self._names()))
+
+        semaphore = asyncio.Semaphore(self._config.max_concurrency)
+        async def probe(watchdog) -> ProbeResult:
+            async with semaphore:
+                result = await Watchdog(watchdog).run()
+            self._trace_slow_probe(result)
+            return result
+
+        for lease in list(self._leases.values()):
+            watchdogs = [watchdog for watchdog in lease.watchdogs if watchdog.name in due]
+            if not watchdogs:
+                continue
+            results = await asyncio.gather(*(probe(watchdog) for watchdog in watchdogs))
+            for result in results:
+                self._scheduler.record(result)
+            if lease.lease_id not in self._leases:
+                continue
+            batch = ProbeResultBatch(agent_id=self._config.agent_id, lease_id=lease.lease_id, results=results)
+            resp = await self._post("/agent/results", batch.model_dump_json().encode())
+            if resp.status_code == 409:
+                self._drop(lease.lease_id)
+            else:
+                resp.raise_for_status()
+
+    def _trace_slow_probe(self, result: ProbeResult) -> None:
+        threshold = self._config.slow_probe_ms
+        if threshold is None or result.timings is None or result.timings.total_ms is None:
+            return
+        if result.timings.total_ms >= threshold:
+            phases = ", ".join(f"{phase}={ms:.1f}" for phase, ms in result.timings.model_dump(exclude_none=True).items())
+            logging.warning(f"Agent {self._config.agent_id}: slow probe {result.name} ({phases})")
+
+    def _drop(self, lease_id: str) -> None:
+        lease = self._leases.pop(lease_id, None)
+        if lease is not None:
+            logging.info(f"Agent {self._config.agent_id}: lost lease on {len(lease.watchdogs)} watchdogs")
+
+    async def _heartbeat_loop(self) -> None:
+        while not self._stopped.is_set():
+            ttl = min((lease.ttl_seconds for lease in self._leases.values()), default=3.0)
+            await self._wait(ttl / 3)
+            if self._stopped.is_set():
+                break
+            if not self._leases:
+                continue
+            heartbeat = Heartbeat(agent_id=self._config.agent_id, lease_ids=list(self._leases.keys()))
+            try:
+                resp = await self._post("/agent/heartbeat", heartbeat.model_dump_json().encode())
+                resp.raise_for_status()
+            except httpx.HTTPError as e:
+                logging.warning(f"Agent {self._config.agent_id}: heartbeat failed: {e}")
+                continue
+            renewed = set(Heartbeat.model_validate_json(resp.content).lease_ids)
+            for lease_id in heartbeat.lease_ids:
+                if lease_id not in renewed:
+                    self._drop(lease_id)
@@ -1,16 +1,27 @@
 # bultin
-import os, json, secrets, asyncio, urllib.parse, logging
-from typing import Callable, Optional
+import os, json, secrets, asyncio, urllib.parse, logging, time
+from typing import Callable, Optional, List, Any, Dict
 from contextlib import asynccontextmanager
 # 3rd party
 from fastapi import FastAPI, HTTPException, Request, Depends, Form
-from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-from fastapi.responses import RedirectResponse, JSONResponse
+from fastapi.responses import RedirectResponse, JSONResponse, Response, HTMLResponse, PlainTextResponse
+from jinja2 import pass_context
+from pydantic import ValidationError, TypeAdapter
 import httpx
 # local imports
 from watchdog.data.web_app_config import WebAppConfig
 from watchdog.oidc import Oidc
+from watchdog.db import Db
+from watchdog.static_files import PrecompressedStaticFiles
+from watchdog.content_encoding import NegotiatedGZipMiddleware
+from watchdog.lease_manager import LeaseManager
+from watchdog.result_store import ResultStore
+from watchdog.sampling_profiler import SamplingProfiler
+from watchdog.data.select_watchdog import SelectWatchdog
+from watchdog.data.create_watchdog import CreateWatchdog
+from watchdog.data.watchdog_query import WatchdogQuery
+from watchdog.data.probe_result import ProbeResult
 
 ###### APP SETUP ######
 # Load configuration
@@ -24,7 +35,7 @@ logging.basicConfig(
     ]
 )
 logging.info("Starting application with configuration:")
-logging.info(json.dumps(config.model_dump(), indent=4))
+logging.info(json.dumps(config.model_dump(exclude={"agents": {"token"}}), indent=4))
 
 # FastAPI app lifecycle events using lifespan context
 
@@ -44,56 +55,116 @@ app = FastAPI()
 # setup dirs
 base_dir = os.path.dirname(os.path.abspath(__file__))
 project_dir = os.path.dirname(base_dir)
-var_dir = os.path.join(project_dir, "var")
-data_file = os.path.join(var_dir, "data.json")
+var_dir = config.data_dir or os.path.join(project_dir, "var")
 os.makedirs(var_dir, exist_ok=True)
 
 template_dir = os.path.join(base_dir, "html_templates")
 static_dir = os.path.join(base_dir, "public_html")
 
-app.mount("/static", StaticFiles(directory=static_dir), name="static")
+# compress large html and json responses, static files negotiate their own precompressed variants and etags
+app.add_middleware(NegotiatedGZipMiddleware, exclude_paths=("/static",), minimum_size=1024, compresslevel=6)
+
+if config.diagnostics.slow_request_ms is not None:
+    @app.middleware("http")
+    async def trace_slow_requests(request: Request, call_next):
+        start = time.monotonic()
+        response = await call_next(request)
+        elapsed_ms = (time.monotonic() - start) * 1000.0
+        if elapsed_ms >= config.diagnostics.slow_request_ms:
+            logging.warning(f"Slow request: {request.method} {request.url.path} -> {response.status_code} took {elapsed_ms:.1f} ms")
+        return response
+
+static_files = PrecompressedStaticFiles(directory=static_dir)
+app.mount("/static", static_files, name="static")
 templates = Jinja2Templates(directory=template_dir)
 
+@pass_context
+def static_url(context, path: str) -> str:
+    return static_files.url_for(context["request"], path)
+templates.env.globals["static_url"] = static_url
+templates.env.filters["timestamp"] = lambda timestamp: time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(timestamp))
+
+# rendered pages that do not depend on the user, keyed by template, path and base url of the request
+page_cache: Dict[tuple, str] = {}
+page_cache_max_size = 64
+
+def cached_page(request: Request, name: str, data: dict, status_code: int = 200) -> HTMLResponse:
+    key = (name, request.url.path, str(request.base_url))
+    html = page_cache.get(key)
+    if html is None:
+        html = templates.get_template(name).render(data)
+        if len(page_cache) >= page_cache_max_size:
+            page_cache.clear()
+        page_cache[key] = html
+    return HTMLResponse(html, status_code=status_code)
+db = Db(var_dir)
+query_adapter = TypeAdapter(List[WatchdogQuery])
+result_adapter = TypeAdapter(List[Any])
+result_store_adapter = TypeAdapter(Dict[str, ProbeResult])
+
 oidc_config_data = config.oidc.model_dump()
 oidc_config_data.update({"post_login_redirect": "watchdogs", "post_logout_redirect": "logged_out"})
 oidc = Oidc(Oidc.Config(**oidc_config_data))
 app.include_router(oidc.get_router())
 
+result_store = ResultStore(var_dir)
+lease_manager = LeaseManager(config.agents, db, result_store)
+app.include_router(lease_manager.get_router())
+
 @app.get("/")
 async def start():
     return RedirectResponse(url="/login")
 
 @app.get("/watchdogs")
 async def watchdogs(request: Request, user: dict = Depends(oidc.get_current_user)):
-    if not os.path.exists(data_file):
-        watchdogs = []
-    else:
-        with open(data_file, "r", encoding="utf-8") as f:
-            watchdogs = json.load(f)
+    watchdogs = await db.execute(SelectWatchdog())
     data = {
         "request": request,
         "watchdogs": watchdogs,
+        "results": await result_store.latest(),
         "user": user
     }
-    return templates.TemplateResponse( "watchdogs.html", data )
+    return templates.TemplateResponse(request, "watchdogs.html", data)
 
 @app.post("/watchdogs")
 async def create_watchdog(request: Request, user: dict = Depends(oidc.get_current_user)):
     if not user:
         raise HTTPException(status_code=403, detail="Not authorized")
-    data = await request.json()
-    if not os.path.exists(data_file):
-        watchdogs = []
-    else:
-        with open(data_file, "r", encoding="utf-8") as f:
-            watchdogs = json.load(f)
-    watchdogs.append(data)
-    with open(data_file, "w", encoding="utf-8") as f:
-        json.dump(watchdogs, f, indent=2)
+    # answer api errors directly, the HTTPException handler redirects to html pages
+    try:
+        query = CreateWatchdog.model_validate_json(await request.body())
+    except ValidationError as e:
+        return JSONResponse({"status": "error", "message": str(e)}, status_code=400)
+    try:
+        await db.execute(query)
+    except ValueError as e:
+        return JSONResponse({"status": "error", "message": str(e)}, status_code=409)
 
     return JSONResponse({"status": "success", "message": "Watchdog created"})
+
+@app.post("/query")
+async def query(request: Request, user: dict = Depends(oidc.get_current_user)):
+    """Runs a batch of queries (select, create, update, delete) in one round-trip and one commit."""
+    if not user:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    try:
+        queries = query_adapter.validate_json(await request.body())
+    except ValidationError as e:
+        return JSONResponse({"status": "error", "message": str(e)}, status_code=400)
+    try:
+        results = await db.run(queries)
+    except ValueError as e:
+        return JSONResponse({"status": "error", "message": str(e)}, status_code=409)
+    return Response(result_adapter.dump_json(results), media_type="application/json")
     
 
+@app.get("/results")
+async def results(user: dict = Depends(oidc.get_current_user)):
+    """Latest probe result of every watchdog including its latency breakdown, keyed by watchdog name."""
+    if not user:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    return Response(result_store_adapter.dump_json(await result_store.latest()), media_type="application/json")
+
 @app.post("/oidc_config")
 async def oidc_config(request: Request, user: dict = Depends(oidc.get_current_user)):
     if not user:
@@ -117,7 +188,26 @@ async def oidc_config(request: Request, user: dict = Depends(oidc.get_current_us
         "link_url": "/watchdogs",
         "link_text": "Show watchdogs"
     }
-    return templates.TemplateResponse("message.html", data, status_code=200)
+    return templates.TemplateResponse(request, "message.html", data, status_code=200)
+
+profiler = SamplingProfiler()
+
+@app.get("/admin/profile")
+async def profile(seconds: float = 10.0, interval_ms: float = 5.0, user: dict = Depends(oidc.get_current_user)):
+    """Samples all threads of this worker for the given time, returns collapsed stacks for flamegraph tools.
+
+    With several workers only the worker that happens to take the request is profiled. Probes run in the agents,
+    they are profiled by sending SIGUSR1 to the agent process."""
+    if not user or user.get("email") not in config.diagnostics.admin_emails:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    if not 0 < seconds <= config.diagnostics.max_profile_seconds or not 1 <= interval_ms <= 1000:
+        return JSONResponse({"status": "error", "message": "Invalid profile duration or interval"}, status_code=400)
+    try:
+        collapsed = await asyncio.to_thread(profiler.profile, seconds, interval_ms / 1000.0)
+    except RuntimeError as e:
+        return JSONResponse({"status": "error", "message": str(e)}, status_code=409)
+    filename = f"profile-{os.getpid()}-{int(time.time())}.collapsed"
+    return PlainTextResponse(collapsed, headers={"Content-Disposition": f'attachment; filename="{filename}"'})
 
 @app.get("/forbidden")
 async def forbidden(request: Request):
@@ -126,7 +216,7 @@ async def forbidden(request: Request):
         "message": "Forbidden", 
         "detail": "You do not have permission to access this resource."
     }
-    return templates.TemplateResponse("message.html", data, status_code=403)
+    return cached_page(request, "message.html", data, status_code=403)
 
 @app.get("/logged_out")
 async def logged_out(request: Request):
@@ -137,7 +227,7 @@ async def logged_out(request: Request):
         "link_url": "/",
         "link_text": "Return to Home"
     }
-    return templates.TemplateResponse("message.html", data, status_code=200)
+    return cached_page(request, "message.html", data, status_code=200)
 
 @app.get("/error")
 async def error(request: Request):
@@ -146,7 +236,7 @@ async def error(request: Request):
         "message": "Error",
         "detail": "An unexpected error occurred."
     }
-    return templates.TemplateResponse("message.html", data, status_code=500)
+    return cached_page(request, "message.html", data, status_code=500)
 
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request: Request, exc: HTTPException):
@@ -0,0 +1,33 @@
+from contextlib import contextmanager
+from typing import Iterator
+import os, secrets
+try:
+    import fcntl
+except ImportError:  # not available on Windows, only a single app worker is safe there
+    fcntl = None
+
+def write_atomic(path: str, raw: bytes) -> None:
+    """Replaces the file in one step, readers see either the old or the new content.
+
+    The temp file has a unique name so concurrent writers do not clobber each other's temp files,
+    it is created like a plain open() would, so it gets the mode of the process umask."""
+    tmp_path = f"{path}.{os.getpid()}.{secrets.token_hex(4)}.tmp"
+    try:
+        with open(tmp_path, "xb") as f:
+            f.write(raw)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+@contextmanager
+def file_lock(path: str, blocking: bool = True) -> Iterator[None]:
+    """Exclusive lock shared by all processes using the same lock file, blocks until it is acquired.
+
+    Without blocking, BlockingIOError is raised if another process holds the lock."""
+    with open(path, "a") as lock:
+        if fcntl is not None:
+            fcntl.flock(lock, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+        # closing the file releases the lock
+        yield
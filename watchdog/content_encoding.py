@@ -0,0 +1,47 @@
+# builtin
+from typing import Dict, Sequence
+# 3rd party
+from starlette.datastructures import Headers
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+def accepted_encodings(accept_encoding: str) -> Dict[str, float]:
+    """q-values of the encodings listed in an Accept-Encoding header, an encoding with q=0 is refused."""
+    qualities: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        encoding, _, params = part.partition(";")
+        encoding = encoding.strip().lower()
+        if not encoding:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        qualities[encoding] = q
+    return qualities
+
+def quality(qualities: Dict[str, float], encoding: str) -> float:
+    return qualities.get(encoding, qualities.get("*", 0.0))
+
+class NegotiatedGZipMiddleware(GZipMiddleware):
+    """GZipMiddleware that honours the q-values of Accept-Encoding and leaves the excluded paths alone,
+    e.g. precompressed static files that negotiate their encoding and ETag themselves."""
+
+    def __init__(self, app: ASGIApp, exclude_paths: Sequence[str] = (), **kwargs):
+        super().__init__(app, **kwargs)
+        self._exclude_paths = tuple(path.rstrip("/") for path in exclude_paths)
+
+    def _excluded(self, path: str) -> bool:
+        return any(path == excluded or path.startswith(excluded + "/") for excluded in self._exclude_paths)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http":
+            qualities = accepted_encodings(Headers(scope=scope).get("accept-encoding", ""))
+            if self._excluded(scope["path"]) or quality(qualities, "gzip") <= 0:
+                await self.app(scope, receive, send)
+                return
+        await super().__call__(scope, receive, send)
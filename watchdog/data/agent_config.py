@@ -0,0 +1,34 @@
+import os, socket
+from typing import Optional
+from pydantic import Field
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+class AgentConfig(BaseSettings):
+    server_url: str = Field(..., pattern=r'^https?://.+')
+    token: str
+    # stable across restarts so the scheduler snapshot is picked up again, set distinct ids for several agents on one host
+    agent_id: str = Field(default_factory=socket.gethostname)
+    max_watchdogs: int = Field(100, ge=1)
+    max_concurrency: int = Field(50, ge=1)
+    interval_seconds: float = Field(30.0, gt=0)
+    max_backoff_level: int = Field(5, ge=0)
+    # scheduler state is written here periodically and restored on startup, {agent_id} is replaced so agents on
+    # one host do not share a file; an agent refuses to start while another one holds the same file
+    snapshot_file: Optional[str] = os.path.join("var", "scheduler-{agent_id}.json")
+    snapshot_interval_seconds: float = Field(30.0, gt=0)
+    # overdue probes are spread over this window after a restart
+    ramp_up_seconds: float = Field(60.0, ge=0)
+    # schedule entries of watchdogs not leased for this long are dropped, a few lease max ages of the app
+    schedule_retention_seconds: float = Field(1800.0, gt=0)
+    # probes taking at least this long are logged with their phase timings, tracing is off if not set
+    slow_probe_ms: Optional[float] = Field(None, gt=0)
+    # on SIGUSR1 the agent profiles itself for this long and writes collapsed stacks to profile_dir
+    profile_seconds: float = Field(10.0, gt=0)
+    profile_dir: str = "var"
+    log_level: str = "info"
+
+    model_config = SettingsConfigDict(
+        env_file=".env", 
+        env_file_encoding="utf-8", 
+        env_prefix="WATCHDOG_AGENT_",
+        extra="ignore")
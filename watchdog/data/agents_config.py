@@ -0,0 +1,10 @@
+from typing import Optional
+from pydantic import BaseModel, Field
+
+class AgentsConfig(BaseModel):
+    # shared bearer token of remote agents, agent endpoints are disabled if not set
+    token: Optional[str] = None
+    # a lease expires if it is not renewed by a heartbeat within this time
+    lease_ttl_seconds: float = Field(30.0, gt=0)
+    # leases are not renewed past this age so agents pick up changed watchdogs
+    lease_max_age_seconds: float = Field(600.0, gt=0)
@@ -0,0 +1,8 @@
+from typing import Annotated, Union
+from pydantic import Field
+
+from .equals import Equals
+from .in_ import In
+
+# leaf conditions that can be parsed from json, dispatched on their literal type tag
+Condition = Annotated[Union[Equals, In], Field(discriminator="type")]
@@ -8,4 +8,4 @@ from .write_query import WriteQuery
 T = TypeVar('T', bound='BaseModel')
 class Delete(WriteQuery):
     type:str
-    descriptor: Descriptor[T] = None
\ No newline at end of file
+    descriptor: Optional[Descriptor] = None
\ No newline at end of file
@@ -1,8 +1,8 @@
 from typing import List, Literal, Optional
 from pydantic import Field
 
-from .query import Query
+from .write_query import WriteQuery
 
-class DeleteWatchdogs(Query):
+class DeleteWatchdogs(WriteQuery):
     type:Literal["delete_watchdogs"] = "delete_watchdogs"
     names: List[str] = Field(..., min_length=1)
\ No newline at end of file
@@ -15,13 +15,14 @@ class Descriptor(BoolCondition):
                 continue
             
             bool_condition:BoolCondition = getattr(self, name)
+            if bool_condition is None:
+                continue
             if not isinstance(bool_condition, BoolCondition):
                 raise ValueError(f"Field {name} is not a BoolCondition")
             
-            if bool_condition is not None:
-                target_value = getattr(obj, name, None)
-                if not bool_condition.evaluate(target_value):
-                    return False
+            target_value = getattr(obj, name, None)
+            if not bool_condition.evaluate(target_value):
+                return False
 
         return True
     
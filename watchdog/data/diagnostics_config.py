@@ -0,0 +1,9 @@
+from typing import Optional
+from pydantic import BaseModel, Field
+
+class DiagnosticsConfig(BaseModel):
+    # users allowed to use the admin endpoints, the endpoints are forbidden for everybody if empty
+    admin_emails: list[str] = []
+    max_profile_seconds: float = Field(60.0, gt=0)
+    # requests taking at least this long are logged, tracing is off if not set
+    slow_request_ms: Optional[float] = Field(None, gt=0)
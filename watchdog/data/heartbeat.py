@@ -0,0 +1,6 @@
+from typing import List
+from pydantic import BaseModel
+
+class Heartbeat(BaseModel):
+    agent_id: str
+    lease_ids: List[str] = []
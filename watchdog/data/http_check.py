@@ -0,0 +1,34 @@
+from typing import Dict, List, Literal, Optional
+import re
+from pydantic import BaseModel, Field, field_validator, model_validator
+
+class HttpCheck(BaseModel):
+    method: Literal["GET", "HEAD", "POST", "OPTIONS"] = "GET"
+    path: str = Field("/", pattern=r'^/')
+    # None accepts any status below 400
+    expected_status: Optional[List[int]] = None
+    # header name -> text its value has to contain, an empty text only requires the header to be present
+    expected_headers: Dict[str, str] = {}
+    # body checks are evaluated on the streamed body, reading stops once they are decided or after max_body_bytes
+    body_contains: Optional[str] = None
+    body_regex: Optional[str] = None
+    max_body_bytes: int = Field(65536, ge=1)
+
+    @field_validator("body_regex")
+    @classmethod
+    def _compiles(cls, value: Optional[str]) -> Optional[str]:
+        if value is not None:
+            try:
+                re.compile(value)
+            except re.error as e:
+                raise ValueError(f"Invalid regular expression: {e}")
+        return value
+
+    @model_validator(mode="after")
+    def _head_has_no_body(self) -> "HttpCheck":
+        if self.method == "HEAD" and (self.body_contains is not None or self.body_regex is not None):
+            raise ValueError("Body checks are not possible with HEAD requests")
+        return self
+
+    def has_body_checks(self) -> bool:
+        return self.body_contains is not None or self.body_regex is not None
@@ -0,0 +1,10 @@
+from typing import List
+from pydantic import BaseModel
+
+from .watchdog import Watchdog
+
+class Lease(BaseModel):
+    lease_id: str
+    agent_id: str
+    ttl_seconds: float
+    watchdogs: List[Watchdog] = []
@@ -0,0 +1,5 @@
+from pydantic import BaseModel, Field
+
+class LeaseRequest(BaseModel):
+    agent_id: str
+    max_watchdogs: int = Field(100, ge=1)
@@ -0,0 +1,18 @@
+from typing import List, Literal
+from pydantic import Field
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+class LoadTestConfig(BaseSettings):
+    # uvicorn workers of the app under test
+    workers: int = Field(1, ge=1)
+    # requests in flight per route
+    concurrency: int = Field(20, ge=1)
+    duration_seconds: float = Field(10.0, gt=0)
+    routes: List[Literal["watchdogs", "create_watchdog", "callback"]] = ["callback", "watchdogs", "create_watchdog"]
+    host: str = "127.0.0.1"
+    port: int = 21029
+    issuer_port: int = 21028
+
+    model_config = SettingsConfigDict(
+        env_prefix="WATCHDOG_LOAD_TEST_",
+        extra="ignore")
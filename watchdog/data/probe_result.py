@@ -0,0 +1,12 @@
+from typing import Optional
+import time
+from pydantic import BaseModel, Field
+
+from .probe_timings import ProbeTimings
+
+class ProbeResult(BaseModel):
+    name: str
+    success: bool
+    detail: Optional[str] = None
+    timings: Optional[ProbeTimings] = None
+    timestamp: float = Field(default_factory=time.time)
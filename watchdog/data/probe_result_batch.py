@@ -0,0 +1,9 @@
+from typing import List
+from pydantic import BaseModel
+
+from .probe_result import ProbeResult
+
+class ProbeResultBatch(BaseModel):
+    agent_id: str
+    lease_id: str
+    results: List[ProbeResult] = []
@@ -0,0 +1,10 @@
+from typing import Optional
+from pydantic import BaseModel
+
+class ProbeTimings(BaseModel):
+    # all durations in milliseconds, measured with a monotonic clock; None if the phase did not happen
+    dns_ms: Optional[float] = None
+    connect_ms: Optional[float] = None
+    tls_ms: Optional[float] = None
+    ttfb_ms: Optional[float] = None
+    total_ms: Optional[float] = None
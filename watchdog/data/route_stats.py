@@ -0,0 +1,13 @@
+from pydantic import BaseModel
+
+class RouteStats(BaseModel):
+    route: str
+    requests: int
+    errors: int
+    duration_seconds: float
+    throughput: float
+    # latency percentiles in milliseconds
+    p50_ms: float
+    p90_ms: float
+    p99_ms: float
+    max_ms: float
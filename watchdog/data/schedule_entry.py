@@ -0,0 +1,12 @@
+from typing import Optional
+import time
+from pydantic import BaseModel, Field
+
+class ScheduleEntry(BaseModel):
+    name: str
+    # wall clock time so it stays meaningful across restarts
+    next_due: float
+    last_success: Optional[bool] = None
+    backoff_level: int = Field(0, ge=0)
+    # wall clock time the watchdog was last seen in a lease of the agent
+    last_leased: float = Field(default_factory=time.time)
@@ -12,10 +12,12 @@ class Select(Query, Generic[T]):
     target_cls: T = Field(default=None, exclude=True)
     
     descriptors: List[ Descriptor ] = []
-    limit: Optional[int] = None
-    offset: Optional[int] = None
+    limit: Optional[int] = Field(None, ge=0)
+    offset: Optional[int] = Field(None, ge=0)
 
     def evaluate(self, obj: T) -> bool:
+        if not self.descriptors:
+            return True
         equals = False
         for descriptor in self.descriptors or []:
             equals = equals or descriptor.evaluate(obj)
@@ -1,9 +1,11 @@
-from typing import Literal, Optional
+from typing import Literal, Optional, List
 from pydantic import BaseModel
 
 from .watchdog import Watchdog
 from .select import Select
+from .watchdog_descriptor import WatchdogDescriptor
 
 class SelectWatchdog(Select[Watchdog]):
     type:Literal["select_watchdog"] = "select_watchdog"
+    descriptors: List[WatchdogDescriptor] = []
     
@@ -8,7 +8,7 @@ from .write_query import WriteQuery
 T = TypeVar('T', bound='BaseModel')
 class Update(WriteQuery):
     type:str
-    descriptor: Descriptor[T] = None
+    descriptor: Optional[Descriptor] = None
         
     def update(self, exisiting_data:dict) -> None:
         update_data = self.model_dump(exclude={"type", "descriptor"})
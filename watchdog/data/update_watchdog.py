@@ -1,9 +1,10 @@
 from typing import Literal, Optional
 from pydantic import BaseModel
 
-from .query import Query
+from .write_query import WriteQuery
+from .http_check import HttpCheck
 
-class UpdateWatchdog(Query):
+class UpdateWatchdog(WriteQuery):
     type:Literal["update_watchdog"] = "update_watchdog"
     name: str
     
@@ -11,3 +12,4 @@ class UpdateWatchdog(Query):
     address: Optional[str] = None
     port: Optional[int] = None
     test_method: Optional[Literal["ping", "tcp", "http", "https"]] = None
+    http_check: Optional[HttpCheck] = None
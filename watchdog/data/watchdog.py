@@ -1,9 +1,13 @@
 from typing import Literal
 from pydantic import BaseModel
 
+from .http_check import HttpCheck
+
 class Watchdog(BaseModel):
     name: str
     enabled: bool = True
     address: str
     port: int
     test_method:Literal["ping", "tcp", "http", "https"] = "ping"
+    # only used by the http and https test methods
+    http_check: HttpCheck = HttpCheck()
@@ -3,14 +3,14 @@ from pydantic import BaseModel
 
 from .descriptor import Descriptor
 from .watchdog import Watchdog
-from .bool_condition import BoolCondition
+from .condition import Condition
 
 class WatchdogDescriptor( Descriptor ):
     type:Literal["watchdog_descriptor"] = "watchdog_descriptor"
 
-    name: Optional[BoolCondition] = None
-    enabled: Optional[BoolCondition] = None
-    address: Optional[BoolCondition] = None
-    port: Optional[BoolCondition] = None
-    test_method: Optional[BoolCondition] = None
+    name: Optional[Condition] = None
+    enabled: Optional[Condition] = None
+    address: Optional[Condition] = None
+    port: Optional[Condition] = None
+    test_method: Optional[Condition] = None
     
\ No newline at end of file
@@ -0,0 +1,13 @@
+from typing import Annotated, Union
+from pydantic import Field
+
+from .select_watchdog import SelectWatchdog
+from .create_watchdog import CreateWatchdog
+from .update_watchdog import UpdateWatchdog
+from .delete_watchdogs import DeleteWatchdogs
+
+# registry of all queries on watchdogs, dispatched on their literal type tag
+WatchdogQuery = Annotated[
+    Union[SelectWatchdog, CreateWatchdog, UpdateWatchdog, DeleteWatchdogs],
+    Field(discriminator="type")
+]
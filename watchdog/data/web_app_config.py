@@ -1,11 +1,26 @@
+from typing import Optional
+from pydantic import model_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 from watchdog.data.boot_oidc_config import BootOidcConfig
+from watchdog.data.agents_config import AgentsConfig
+from watchdog.data.diagnostics_config import DiagnosticsConfig
 
 from .uvicorn_config import UvicornConfig
 
 class WebAppConfig(BaseSettings, UvicornConfig):
     oidc: BootOidcConfig    
+    agents: AgentsConfig = AgentsConfig()
+    diagnostics: DiagnosticsConfig = DiagnosticsConfig()
+    # directory of the stored data, defaults to var/ in the project dir
+    data_dir: Optional[str] = None
+
+    @model_validator(mode="after")
+    def _agents_need_single_worker(self) -> "WebAppConfig":
+        # leases live in the memory of one worker, with several workers agents get overlapping leases
+        if self.agents.token and self.workers > 1:
+            raise ValueError("Agents (agents.token) need the app to run with a single worker")
+        return self
     
     model_config = SettingsConfigDict(
         env_file=".env", 
@@ -1,22 +1,25 @@
-from typing import Literal, Any, List, get_args, get_origin, Generic
-from typing import get_type_hints
+from typing import Any, List
+import asyncio, os
+
 from .data.query import Query
-from .data.insert import Insert
-from .data.update import Update
-from .data.delete import Delete
-from .data.select import Select
 from .data.write_query import WriteQuery
-import asyncio, json
-from pathlib import Path
-import asyncio, json
-from pathlib import Path
-import inspect
+from .data.watchdog import Watchdog
+from .data.select_watchdog import SelectWatchdog
+from .data.create_watchdog import CreateWatchdog
+from .data.update_watchdog import UpdateWatchdog
+from .data.delete_watchdogs import DeleteWatchdogs
+from .atomic_file import file_lock
+from .watchdog_codec import WatchdogCodec
 
 class Db():
-        
+
     def __init__(self, data_dir:str):
         self._data_dir = data_dir
+        self._data_file = os.path.join(data_dir, "data.json")
+        self._lock_file = os.path.join(data_dir, "data.json.lock")
+        self._codec = WatchdogCodec()
         self._queued_queries:List[WriteQuery] = []
+        self._lock = asyncio.Lock()
 
     def enqueue(self, query: WriteQuery) -> None:
         if not isinstance(query, WriteQuery):
@@ -24,13 +27,65 @@ class Db():
         self._queued_queries.append(query)
 
     async def commit(self) -> List[Any]:
-        results = []
-        for query in self._queued_queries:
-            result = await self.execute(query)
-            results.append(result)
+        queries = list(self._queued_queries)
         self._queued_queries.clear()
-        return results
-    
-    async def execute(self, select: Select) -> Any:
-        target_class = select.__class__.model_fields["target_cls"].annotation
-        print(f"Executing select query on {select.type} with target class {target_class}")
\ No newline at end of file
+        return await self.run(queries)
+
+    async def execute(self, query: Query) -> Any:
+        results = await self.run([query])
+        return results[0]
+
+    async def run(self, queries: List[Query]) -> List[Any]:
+        """Runs all queries in order against one load of the data and writes back at most once.
+        Nothing is written if any query fails."""
+        async with self._lock:
+            # the file lock blocks, keep the event loop free while waiting for other workers
+            return await asyncio.to_thread(self._run_locked, queries)
+
+    def _run_locked(self, queries: List[Query]) -> List[Any]:
+        # every app worker is its own process, the file lock keeps their load, modify, save cycles apart
+        with file_lock(self._lock_file):
+            watchdogs = self._codec.load(self._data_file)
+            results = []
+            for query in queries:
+                func = getattr(self, f"_run_{query.type}", None)
+                if func is None:
+                    raise ValueError(f"Unknown query type: {query.type}")
+                results.append(func(watchdogs, query))
+            if any(isinstance(query, WriteQuery) for query in queries):
+                self._codec.save(self._data_file, watchdogs)
+            return results
+
+    def _index_of(self, watchdogs: List[Watchdog], name: str) -> int:
+        for i, watchdog in enumerate(watchdogs):
+            if watchdog.name == name:
+                return i
+        return -1
+
+    def _run_select_watchdog(self, watchdogs: List[Watchdog], query: SelectWatchdog) -> List[Watchdog]:
+        selected = [watchdog for watchdog in watchdogs if query.evaluate(watchdog)]
+        start = query.offset or 0
+        end = start + query.limit if query.limit is not None else None
+        return selected[start:end]
+
+    def _run_create_watchdog(self, watchdogs: List[Watchdog], query: CreateWatchdog) -> Watchdog:
+        if self._index_of(watchdogs, query.name) != -1:
+            raise ValueError(f"Watchdog {query.name} already exists")
+        watchdog = Watchdog(**query.data())
+        watchdogs.append(watchdog)
+        return watchdog
+
+    def _run_update_watchdog(self, watchdogs: List[Watchdog], query: UpdateWatchdog) -> Watchdog:
+        i = self._index_of(watchdogs, query.name)
+        if i == -1:
+            raise ValueError(f"Watchdog {query.name} does not exist")
+        update_data = {field: value for field, value in query if field not in ("type", "name") and value is not None}
+        watchdogs[i] = watchdogs[i].model_copy(update=update_data)
+        return watchdogs[i]
+
+    def _run_delete_watchdogs(self, watchdogs: List[Watchdog], query: DeleteWatchdogs) -> int:
+        names = set(query.names)
+        remaining = [watchdog for watchdog in watchdogs if watchdog.name not in names]
+        deleted = len(watchdogs) - len(remaining)
+        watchdogs[:] = remaining
+        return deleted
@@ -0,0 +1,79 @@
+# builtin
+import secrets, time, urllib.parse
+# 3rd party
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from jose import jwk, jwt
+
+class FakeOidcIssuer:
+    """Local stand-in for an OpenID Connect provider, only meant for load tests.
+
+    Serves the discovery document, the JWKS and a token endpoint that accepts any code.
+    All id tokens are signed with an RSA key generated on construction."""
+
+    def __init__(self, issuer: str, client_id: str, email: str):
+        self._issuer = issuer.rstrip("/")
+        self._client_id = client_id
+        self._email = email
+        key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        self._private_pem = key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption()
+        )
+        public_pem = key.public_key().public_bytes(
+            serialization.Encoding.PEM,
+            serialization.PublicFormat.SubjectPublicKeyInfo
+        )
+        self._kid = secrets.token_hex(8)
+        self._jwk = jwk.construct(public_pem, "RS256").to_dict()
+        self._jwk.update({"kid": self._kid, "use": "sig"})
+
+    def issuer(self) -> str:
+        return self._issuer
+
+    def mint_id_token(self, ttl_seconds: int = 3600) -> str:
+        now = int(time.time())
+        claims = {
+            "iss": self._issuer,
+            "aud": self._client_id,
+            "sub": self._email,
+            "email": self._email,
+            "iat": now,
+            "exp": now + ttl_seconds
+        }
+        return jwt.encode(claims, self._private_pem, algorithm="RS256", headers={"kid": self._kid})
+
+    async def _openid_configuration(self):
+        return JSONResponse({
+            "issuer": self._issuer,
+            "authorization_endpoint": f"{self._issuer}/authorize",
+            "token_endpoint": f"{self._issuer}/token",
+            "jwks_uri": f"{self._issuer}/jwks",
+            "response_types_supported": ["code"],
+            "subject_types_supported": ["public"],
+            "id_token_signing_alg_values_supported": ["RS256"]
+        })
+
+    async def _jwks(self):
+        return JSONResponse({"keys": [self._jwk]})
+
+    async def _token(self, request: Request):
+        form = urllib.parse.parse_qs((await request.body()).decode())
+        if form.get("grant_type") != ["authorization_code"] or not form.get("code"):
+            return JSONResponse({"error": "invalid_grant"}, status_code=400)
+        return JSONResponse({
+            "id_token": self.mint_id_token(),
+            "access_token": secrets.token_urlsafe(16),
+            "token_type": "Bearer",
+            "expires_in": 3600
+        })
+
+    def get_app(self) -> FastAPI:
+        app = FastAPI()
+        app.add_api_route("/.well-known/openid-configuration", self._openid_configuration, methods=["GET"])
+        app.add_api_route("/jwks", self._jwks, methods=["GET"])
+        app.add_api_route("/token", self._token, methods=["POST"])
+        return app
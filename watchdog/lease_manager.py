@@ -0,0 +1,152 @@
+# builtin
+from typing import Dict, List, Optional
+import asyncio, gzip, logging, secrets, time, zlib
+# 3rd party
+from fastapi import APIRouter, Request
+from fastapi.responses import JSONResponse, Response
+# local
+from .db import Db
+from .result_store import ResultStore
+from .data.agents_config import AgentsConfig
+from .data.equals import Equals
+from .data.heartbeat import Heartbeat
+from .data.lease import Lease
+from .data.lease_request import LeaseRequest
+from .data.probe_result_batch import ProbeResultBatch
+from .data.select_watchdog import SelectWatchdog
+from .data.watchdog_descriptor import WatchdogDescriptor
+
+class LeaseManager:
+    """Hands out batches of watchdogs to remote agents.
+
+    A lease is held as long as its agent renews it with heartbeats. Expired leases (e.g. of a dead agent)
+    free their watchdogs for the next agent asking for work. Lease state lives in this process only,
+    so the app has to run with a single worker when agents are used. Reported results are kept in the result store."""
+
+    def __init__(self, config: AgentsConfig, db: Db, result_store: ResultStore):
+        self._config = config
+        self._db = db
+        self._result_store = result_store
+        self._leases: Dict[str, Lease] = {}
+        self._deadlines: Dict[str, float] = {}
+        self._created: Dict[str, float] = {}
+        self._lock = asyncio.Lock()
+
+    def leases(self) -> List[Lease]:
+        return list(self._leases.values())
+
+    def _release(self, lease_id: str, reason: str) -> None:
+        lease = self._leases.pop(lease_id)
+        del self._deadlines[lease_id]
+        del self._created[lease_id]
+        logging.info(f"Lease {lease_id} of agent {lease.agent_id} {reason}, releasing {len(lease.watchdogs)} watchdogs")
+
+    def _expire(self, now: float) -> None:
+        for lease_id, deadline in list(self._deadlines.items()):
+            if deadline < now:
+                self._release(lease_id, "expired")
+
+    async def acquire(self, request: LeaseRequest, now: Optional[float] = None) -> Lease:
+        enabled = SelectWatchdog(descriptors=[WatchdogDescriptor(enabled=Equals(value=True))])
+        watchdogs = await self._db.execute(enabled)
+        async with self._lock:
+            now = time.monotonic() if now is None else now
+            self._expire(now)
+            leased = {watchdog.name for lease in self._leases.values() for watchdog in lease.watchdogs}
+            free = [watchdog for watchdog in watchdogs if watchdog.name not in leased]
+            lease = Lease(
+                lease_id=secrets.token_urlsafe(16),
+                agent_id=request.agent_id,
+                ttl_seconds=self._config.lease_ttl_seconds,
+                watchdogs=free[:request.max_watchdogs]
+            )
+            if lease.watchdogs:
+                self._leases[lease.lease_id] = lease
+                self._deadlines[lease.lease_id] = now + self._config.lease_ttl_seconds
+                self._created[lease.lease_id] = now
+                logging.debug(f"Leased {len(lease.watchdogs)} watchdogs to agent {request.agent_id}")
+            return lease
+
+    async def renew(self, heartbeat: Heartbeat, now: Optional[float] = None) -> Heartbeat:
+        """Renews the leases of the agent, returns the ones that are still held."""
+        async with self._lock:
+            now = time.monotonic() if now is None else now
+            self._expire(now)
+            renewed = []
+            for lease_id in heartbeat.lease_ids:
+                lease = self._leases.get(lease_id)
+                if lease is None or lease.agent_id != heartbeat.agent_id:
+                    continue
+                if now - self._created[lease_id] > self._config.lease_max_age_seconds:
+                    # free the watchdogs right away, the agent drops the lease as soon as it is not renewed
+                    self._release(lease_id, "reached its max age")
+                    continue
+                self._deadlines[lease_id] = now + self._config.lease_ttl_seconds
+                renewed.append(lease_id)
+            return Heartbeat(agent_id=heartbeat.agent_id, lease_ids=renewed)
+
+    async def report(self, batch: ProbeResultBatch) -> Optional[int]:
+        """Stores the results of a lease, returns None if the lease is not held by the agent."""
+        async with self._lock:
+            lease = self._leases.get(batch.lease_id)
+            if lease is None or lease.agent_id != batch.agent_id:
+                return None
+            names = {watchdog.name for watchdog in lease.watchdogs}
+            accepted = [result for result in batch.results if result.name in names]
+        await self._result_store.update(accepted)
+        return len(accepted)
+
+    def _authorized(self, request: Request) -> bool:
+        token = self._config.token
+        if not token:
+            return False
+        auth = request.headers.get("authorization", "")
+        return secrets.compare_digest(auth, f"Bearer {token}")
+
+    async def _body(self, request: Request) -> bytes:
+        body = await request.body()
+        if request.headers.get("content-encoding") == "gzip":
+            try:
+                body = gzip.decompress(body)
+            except (OSError, EOFError, zlib.error) as e:
+                raise ValueError(f"Invalid gzip body: {e}")
+        return body
+
+    async def _lease(self, request: Request):
+        if not self._authorized(request):
+            return JSONResponse({"error": "Not authorized"}, status_code=401)
+        try:
+            lease_request = LeaseRequest.model_validate_json(await self._body(request))
+        except ValueError as e:
+            return JSONResponse({"error": str(e)}, status_code=400)
+        lease = await self.acquire(lease_request)
+        return Response(lease.model_dump_json(), media_type="application/json")
+
+    async def _heartbeat(self, request: Request):
+        if not self._authorized(request):
+            return JSONResponse({"error": "Not authorized"}, status_code=401)
+        try:
+            heartbeat = Heartbeat.model_validate_json(await self._body(request))
+        except ValueError as e:
+            return JSONResponse({"error": str(e)}, status_code=400)
+        renewed = await self.renew(heartbeat)
+        return Response(renewed.model_dump_json(), media_type="application/json")
+
+    async def _report(self, request: Request):
+        if not self._authorized(request):
+            return JSONResponse({"error": "Not authorized"}, status_code=401)
+        try:
+            batch = ProbeResultBatch.model_validate_json(await self._body(request))
+        except ValueError as e:
+            return JSONResponse({"error": str(e)}, status_code=400)
+        accepted = await self.report(batch)
+        if accepted is None:
+            return JSONResponse({"error": "Lease not held"}, status_code=409)
+        return JSONResponse({"accepted": accepted})
+
+    def get_router(self) -> APIRouter:
+        router = APIRouter()
+        router.add_api_route("/agent/lease", self._lease, methods=["POST"])
+        router.add_api_route("/agent/heartbeat", self._heartbeat, methods=["POST"])
+        router.add_api_route("/agent/results", self._report, methods=["POST"])
+        return router
@@ -0,0 +1,156 @@
+# builtin
+from typing import Awaitable, Callable, List
+import asyncio, itertools, json, logging, multiprocessing, os, subprocess, sys, tempfile, time
+# 3rd party
+import httpx
+import uvicorn
+# local
+from .functor import Functor
+from .fake_oidc_issuer import FakeOidcIssuer
+from .data.load_test_config import LoadTestConfig
+from .data.route_stats import RouteStats
+
+def _serve_issuer(issuer: FakeOidcIssuer, host: str, port: int) -> None:
+    uvicorn.run(issuer.get_app(), host=host, port=port, log_level="warning")
+
+class LoadTest(Functor[List[RouteStats]]):
+    """End to end load test of the web app.
+
+    Starts a fake OIDC issuer and the app with uvicorn and N workers in subprocesses,
+    then drives each route with a fixed number of concurrent requests for a fixed time."""
+
+    # not a test case, even though its name matches the test class pattern of pytest
+    __test__ = False
+
+    def __init__(self, config: LoadTestConfig):
+        self._config = config
+        self._client_id = "load-test"
+        self._email = "load-test@example.com"
+        self._counter = itertools.count()
+        self._created: List[str] = []
+
+    async def run(self) -> List[RouteStats]:
+        config = self._config
+        issuer = FakeOidcIssuer(f"http://{config.host}:{config.issuer_port}", self._client_id, self._email)
+        issuer_proc = multiprocessing.Process(target=_serve_issuer, args=(issuer, config.host, config.issuer_port), daemon=True)
+        issuer_proc.start()
+
+        project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        with tempfile.TemporaryDirectory() as data_dir:
+            env = dict(os.environ)
+            env.update({
+                "WATCHDOG_OIDC__ISSUER": issuer.issuer(),
+                "WATCHDOG_OIDC__CLIENT_ID": self._client_id,
+                "WATCHDOG_OIDC__CLIENT_S": "load-test",
+                "WATCHDOG_OIDC__ALLOWED_EMAILS": json.dumps([self._email]),
+                "WATCHDOG_DATA_DIR": data_dir,
+                "WATCHDOG_WORKERS": str(config.workers),
+                "WATCHDOG_LOG_LEVEL": "warning"
+            })
+            app_cmd = [
+                sys.executable, "-m", "uvicorn", "watchdog.app:app",
+                "--host", config.host, "--port", str(config.port),
+                "--workers", str(config.workers), "--log-level", "warning"
+            ]
+            app_proc = subprocess.Popen(app_cmd, env=env, cwd=project_dir)
+            try:
+                base_url = f"http://{config.host}:{config.port}"
+                limits = httpx.Limits(max_connections=config.concurrency, max_keepalive_connections=config.concurrency)
+                async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30.0) as client:
+                    await self._wait_until_up(client, issuer.issuer())
+                    token = issuer.mint_id_token()
+                    stats = []
+                    for route in config.routes:
+                        logging.info(f"Load testing {route} with {config.concurrency} concurrent requests for {config.duration_seconds}s")
+                        send = getattr(self, f"_send_{route}")
+                        route_stats = await self._drive(route, lambda: send(client, token))
+                        verify = getattr(self, f"_verify_{route}", None)
+                        if verify is not None:
+                            route_stats.errors += await verify(client, token)
+                        stats.append(route_stats)
+                    return stats
+            finally:
+                app_proc.terminate()
+                app_proc.wait(timeout=30)
+                issuer_proc.terminate()
+                issuer_proc.join(timeout=30)
+
+    async def _wait_until_up(self, client: httpx.AsyncClient, issuer: str, timeout: float = 30.0) -> None:
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                issuer_resp = await client.get(f"{issuer}/.well-known/openid-configuration")
+                resp = await client.get("/static/style.css")
+                if issuer_resp.status_code == 200 and resp.status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.2)
+        raise RuntimeError("App under test or fake issuer did not start in time")
+
+    async def _send_watchdogs(self, client: httpx.AsyncClient, token: str) -> bool:
+        resp = await client.get("/watchdogs", headers={"Cookie": f"token={token}"})
+        return resp.status_code == 200
+
+    async def _send_create_watchdog(self, client: httpx.AsyncClient, token: str) -> bool:
+        watchdog = {"name": f"load-test-{next(self._counter)}", "address": "127.0.0.1", "port": 80}
+        resp = await client.post("/watchdogs", json=watchdog, headers={"Cookie": f"token={token}"})
+        if resp.status_code != 200:
+            return False
+        self._created.append(watchdog["name"])
+        return True
+
+    async def _verify_create_watchdog(self, client: httpx.AsyncClient, token: str) -> int:
+        # a 200 does not prove the record survived concurrent saves of other workers, count the lost ones as errors
+        resp = await client.post("/query", json=[{"type": "select_watchdog"}], headers={"Cookie": f"token={token}"})
+        resp.raise_for_status()
+        stored = {watchdog["name"] for watchdog in resp.json()[0]}
+        lost = [name for name in self._created if name not in stored]
+        if lost:
+            logging.error(f"{len(lost)} of {len(self._created)} created watchdogs were lost")
+        return len(lost)
+
+    async def _send_callback(self, client: httpx.AsyncClient, token: str) -> bool:
+        # the fake issuer accepts any code, a successful login redirects and sets the token cookie
+        state = f"load-test-{next(self._counter)}"
+        resp = await client.get("/callback", params={"state": state, "code": "load-test"}, headers={"Cookie": f"oidc_state={state}"})
+        return resp.is_redirect and "token=" in resp.headers.get("set-cookie", "")
+
+    async def _drive(self, route: str, send: Callable[[], Awaitable[bool]]) -> RouteStats:
+        latencies: List[float] = []
+        errors = 0
+        deadline = time.monotonic() + self._config.duration_seconds
+
+        async def worker():
+            nonlocal errors
+            while time.monotonic() < deadline:
+                start = time.monotonic()
+                try:
+                    ok = await send()
+                except httpx.HTTPError:
+                    ok = False
+                latencies.append(time.monotonic() - start)
+                if not ok:
+                    errors += 1
+
+        start = time.monotonic()
+        await asyncio.gather(*(worker() for _ in range(self._config.concurrency)))
+        duration = time.monotonic() - start
+
+        latencies.sort()
+        def percentile(q: float) -> float:
+            if not latencies:
+                return 0.0
+            return latencies[min(len(latencies) - 1, round(q * (len(latencies) - 1)))] * 1000.0
+
+        return RouteStats(
+            route=route,
+            requests=len(latencies),
+            errors=errors,
+            duration_seconds=duration,
+            throughput=len(latencies) / duration if duration > 0 else 0.0,
+            p50_ms=percentile(0.5),
+            p90_ms=percentile(0.9),
+            p99_ms=percentile(0.99),
+            max_ms=percentile(1.0)
+        )
@@ -0,0 +1,44 @@
+from typing import Dict, List
+import asyncio, logging, os
+
+from pydantic import TypeAdapter, ValidationError
+
+from .atomic_file import file_lock, write_atomic
+from .data.probe_result import ProbeResult
+
+class ResultStore():
+    """Latest probe result of every watchdog as reported by the agents, kept in results.json of the data dir
+    so every app worker can show it."""
+
+    _adapter: TypeAdapter[Dict[str, ProbeResult]] = TypeAdapter(Dict[str, ProbeResult])
+
+    def __init__(self, data_dir: str):
+        self._results_file = os.path.join(data_dir, "results.json")
+        self._lock_file = os.path.join(data_dir, "results.json.lock")
+
+    def _load(self) -> Dict[str, ProbeResult]:
+        if not os.path.exists(self._results_file):
+            return {}
+        try:
+            with open(self._results_file, "rb") as f:
+                return self._adapter.validate_json(f.read())
+        except ValidationError as e:
+            # only a cache of the latest state, the next reports rebuild it
+            logging.warning(f"Discarding invalid probe results in {self._results_file}: {e}")
+            return {}
+
+    def _update(self, results: List[ProbeResult]) -> None:
+        with file_lock(self._lock_file):
+            latest = self._load()
+            for result in results:
+                previous = latest.get(result.name)
+                if previous is None or previous.timestamp <= result.timestamp:
+                    latest[result.name] = result
+            write_atomic(self._results_file, self._adapter.dump_json(latest))
+
+    async def latest(self) -> Dict[str, ProbeResult]:
+        return await asyncio.to_thread(self._load)
+
+    async def update(self, results: List[ProbeResult]) -> None:
+        if results:
+            await asyncio.to_thread(self._update, results)
@@ -0,0 +1,39 @@
+from collections import Counter
+import os, sys, threading, time
+
+class SamplingProfiler():
+    """Statistical profiler for the running process.
+
+    Samples the stacks of all other threads at a fixed interval and aggregates them into collapsed stacks,
+    one "frame;frame;frame count" line per distinct stack, which flamegraph tools read directly."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    def busy(self) -> bool:
+        return self._lock.locked()
+
+    def profile(self, seconds: float, interval_seconds: float = 0.005) -> str:
+        """Blocks for the given time, meant to be run in a background thread. Only one profile can run at a time."""
+        if not self._lock.acquire(blocking=False):
+            raise RuntimeError("A profile is already running")
+        try:
+            own_id = threading.get_ident()
+            counts: Counter = Counter()
+            deadline = time.monotonic() + seconds
+            while time.monotonic() < deadline:
+                thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+                for thread_id, frame in sys._current_frames().items():
+                    if thread_id == own_id:
+                        continue
+                    stack = []
+                    while frame is not None:
+                        code = frame.f_code
+                        stack.append(f"{code.co_qualname} ({os.path.basename(code.co_filename)})")
+                        frame = frame.f_back
+                    stack.append(thread_names.get(thread_id, str(thread_id)))
+                    counts[";".join(reversed(stack))] += 1
+                time.sleep(interval_seconds)
+            return "".join(f"{stack} {count}\n" for stack, count in counts.most_common())
+        finally:
+            self._lock.release()
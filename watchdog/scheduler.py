@@ -0,0 +1,90 @@
+from typing import Dict, Iterable, List, Optional
+import logging, os, random, time
+
+from pydantic import TypeAdapter, ValidationError
+
+from .atomic_file import write_atomic
+from .data.probe_result import ProbeResult
+from .data.schedule_entry import ScheduleEntry
+
+class Scheduler():
+    """Keeps track of when each watchdog is due next.
+
+    Repeatedly failing probes back off exponentially up to 2**(max_backoff_level - 1) intervals. The state can be snapshotted
+    to a file and restored on startup, probes that became overdue in the meantime are spread over a ramp up
+    window instead of all running at once. Entries of watchdogs that were not leased for retention_seconds are dropped."""
+
+    _adapter: TypeAdapter[List[ScheduleEntry]] = TypeAdapter(List[ScheduleEntry])
+
+    def __init__(self, interval_seconds: float, ramp_up_seconds: float = 60.0, max_backoff_level: int = 5,
+                 retention_seconds: float = 1800.0):
+        self._interval = interval_seconds
+        self._ramp_up = ramp_up_seconds
+        self._max_backoff_level = max_backoff_level
+        self._retention = retention_seconds
+        self._entries: Dict[str, ScheduleEntry] = {}
+        self._ramp_up_until = 0.0
+
+    def entries(self) -> List[ScheduleEntry]:
+        return list(self._entries.values())
+
+    def _ramp_up_slot(self, now: float) -> float:
+        # new or overdue watchdogs are due at a random time within the remaining ramp up window
+        if now >= self._ramp_up_until:
+            return now
+        return now + random.uniform(0.0, self._ramp_up_until - now)
+
+    def sync(self, names: Iterable[str], now: Optional[float] = None) -> None:
+        """Adds entries for the currently leased watchdogs that are not tracked yet. Entries of other watchdogs
+        are kept for retention_seconds, e.g. a restored entry whose watchdog is still leased to the previous run
+        of the agent, and dropped afterwards, e.g. when the watchdog was deleted or moved to another agent."""
+        now = time.time() if now is None else now
+        for name in names:
+            entry = self._entries.get(name)
+            if entry is None:
+                self._entries[name] = ScheduleEntry(name=name, next_due=self._ramp_up_slot(now), last_leased=now)
+            else:
+                entry.last_leased = now
+        for name, entry in list(self._entries.items()):
+            if now - entry.last_leased > self._retention:
+                del self._entries[name]
+
+    def due(self, names: Iterable[str], now: Optional[float] = None) -> List[str]:
+        now = time.time() if now is None else now
+        return [name for name in names if name in self._entries and self._entries[name].next_due <= now]
+
+    def next_due(self, names: Iterable[str]) -> Optional[float]:
+        return min((self._entries[name].next_due for name in names if name in self._entries), default=None)
+
+    def record(self, result: ProbeResult, now: Optional[float] = None) -> None:
+        entry = self._entries.get(result.name)
+        if entry is None:
+            return
+        now = time.time() if now is None else now
+        if result.success:
+            entry.backoff_level = 0
+        else:
+            entry.backoff_level = min(entry.backoff_level + 1, self._max_backoff_level)
+        entry.last_success = result.success
+        entry.next_due = now + self._interval * 2 ** max(entry.backoff_level - 1, 0)
+
+    def snapshot(self, path: str) -> None:
+        write_atomic(path, self._adapter.dump_json(self.entries()))
+
+    def restore(self, path: str, now: Optional[float] = None) -> None:
+        now = time.time() if now is None else now
+        self._ramp_up_until = now + self._ramp_up
+        if not os.path.exists(path):
+            return
+        try:
+            with open(path, "rb") as f:
+                entries = self._adapter.validate_json(f.read())
+        except (OSError, ValidationError) as e:
+            logging.warning(f"Could not restore scheduler snapshot {path}: {e}")
+            return
+        overdue = sorted((entry for entry in entries if entry.next_due <= now), key=lambda entry: entry.next_due)
+        for i, entry in enumerate(overdue):
+            # keep the original order of the overdue probes while spreading them evenly
+            entry.next_due = now + self._ramp_up * i / len(overdue)
+        self._entries = {entry.name: entry for entry in entries}
+        logging.info(f"Restored {len(entries)} schedule entries, spreading {len(overdue)} overdue probes over {self._ramp_up}s")
@@ -0,0 +1,81 @@
+# builtin
+from typing import Dict
+import gzip, hashlib, mimetypes, os
+# 3rd party
+from fastapi import Request
+from fastapi.responses import Response
+from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers, QueryParams
+from starlette.types import Scope
+# local
+from .content_encoding import accepted_encodings, quality
+try:
+    import brotli
+except ImportError:  # brotli is optional, assets are only precompressed with gzip then
+    brotli = None
+
+class PrecompressedStaticFiles(StaticFiles):
+    """Static files compressed once at startup and served with content hashed urls.
+
+    Requests carrying the current content hash as ?v= are cached by clients for a year,
+    all other requests have to revalidate with the ETag."""
+
+    def __init__(self, directory: str, **kwargs):
+        super().__init__(directory=directory, **kwargs)
+        self._variants: Dict[str, Dict[str, bytes]] = {}
+        self._hashes: Dict[str, str] = {}
+        for root, _, files in os.walk(directory):
+            for file in files:
+                file_path = os.path.join(root, file)
+                path = os.path.relpath(file_path, directory).replace(os.sep, "/")
+                with open(file_path, "rb") as f:
+                    data = f.read()
+                variants = {"identity": data}
+                compressed = gzip.compress(data, compresslevel=9)
+                if len(compressed) < len(data):
+                    variants["gzip"] = compressed
+                if brotli is not None:
+                    compressed = brotli.compress(data)
+                    if len(compressed) < len(data):
+                        variants["br"] = compressed
+                self._variants[path] = variants
+                self._hashes[path] = hashlib.sha256(data).hexdigest()[:16]
+
+    def url_for(self, request: Request, path: str) -> str:
+        url = str(request.url_for("static", path=path))
+        content_hash = self._hashes.get(path)
+        return f"{url}?v={content_hash}" if content_hash else url
+
+    def _encoding(self, accept_encoding: str, variants: Dict[str, bytes]) -> str:
+        qualities = accepted_encodings(accept_encoding)
+        best, best_q = "identity", 0.0
+        for encoding in ("br", "gzip"):
+            q = quality(qualities, encoding)
+            if encoding in variants and q > best_q:
+                best, best_q = encoding, q
+        return best
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        path = path.replace(os.sep, "/")
+        variants = self._variants.get(path)
+        if variants is None or scope["method"] not in ("GET", "HEAD"):
+            return await super().get_response(path, scope)
+
+        request_headers = Headers(scope=scope)
+        encoding = self._encoding(request_headers.get("accept-encoding", ""), variants)
+        content_hash = self._hashes[path]
+        # every encoding is a different representation and needs its own strong validator
+        etag = f'"{content_hash}"' if encoding == "identity" else f'"{content_hash}-{encoding}"'
+        immutable = QueryParams(scope["query_string"]).get("v") == content_hash
+        headers = {
+            "ETag": etag,
+            "Cache-Control": "public, max-age=31536000, immutable" if immutable else "no-cache",
+            "Vary": "Accept-Encoding"
+        }
+        if etag in request_headers.get("if-none-match", ""):
+            return Response(status_code=304, headers=headers)
+
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+        media_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        return Response(variants[encoding], media_type=media_type, headers=headers)
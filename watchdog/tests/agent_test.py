@@ -0,0 +1,129 @@
+import asyncio, logging, os, socket, time
+
+import pytest
+
+import uvicorn
+from fastapi import FastAPI
+
+from watchdog.agent import Agent
+from watchdog.db import Db
+from watchdog.lease_manager import LeaseManager
+from watchdog.result_store import ResultStore
+from watchdog.data.agent_config import AgentConfig
+from watchdog.data.agents_config import AgentsConfig
+from watchdog.data.create_watchdog import CreateWatchdog
+from watchdog.data.lease import Lease
+
+names = ["w1", "w2", "w3", "w4"]
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+async def until(condition, timeout: float = 10.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not met in time"
+        await asyncio.sleep(0.05)
+
+def leased(agent: Agent) -> set:
+    return {watchdog.name for lease in agent.leases() for watchdog in lease.watchdogs}
+
+def agent(port: int, agent_id: str, **config) -> Agent:
+    return Agent(AgentConfig(**{
+        "server_url": f"http://127.0.0.1:{port}", "token": "secret", "agent_id": agent_id,
+        "interval_seconds": 0.2, "ramp_up_seconds": 0.0, "snapshot_file": None, **config
+    }))
+
+async def test_agents_on_localhost_take_over_from_a_dead_agent(tmp_path, caplog):
+    port = free_port()
+    # the watchdogs probe the port of the app itself, so every probe succeeds
+    db = Db(str(tmp_path))
+    await db.run([CreateWatchdog(name=name, address="127.0.0.1", port=port, test_method="tcp") for name in names])
+    store = ResultStore(str(tmp_path))
+    app = FastAPI()
+    app.include_router(LeaseManager(AgentsConfig(token="secret", lease_ttl_seconds=1.0), db, store).get_router())
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    server_task = asyncio.create_task(server.serve())
+    await until(lambda: server.started)
+
+    first, second = agent(port, "first"), agent(port, "second")
+    first_task = asyncio.create_task(first.run())
+    try:
+        await until(lambda: leased(first) == set(names))
+        second_task = asyncio.create_task(second.run())
+        await asyncio.sleep(0.5)
+        assert leased(second) == set()
+
+        # kill the first agent, its leases are not renewed anymore and expire after the ttl
+        first_task.cancel()
+        killed = time.time()
+        await until(lambda: leased(second) == set(names))
+
+        async def probed_by_second() -> bool:
+            latest = await store.latest()
+            return all(name in latest and latest[name].timestamp > killed and latest[name].success for name in names)
+        deadline = time.monotonic() + 10.0
+        while not await probed_by_second():
+            assert time.monotonic() < deadline, "results of the second agent did not reach the store"
+            await asyncio.sleep(0.05)
+
+        # a clean shutdown while leases are held ends without errors
+        second.stop()
+        await asyncio.wait_for(second_task, timeout=5.0)
+    finally:
+        first_task.cancel()
+        server.should_exit = True
+        await server_task
+    assert not [record for record in caplog.records if record.levelno >= logging.ERROR]
+
+async def test_heartbeat_loop_ends_on_stop():
+    stopping = agent(free_port(), "stopping")
+    stopping._leases = {"lease": Lease(lease_id="lease", agent_id="stopping", ttl_seconds=3.0)}
+    posts = []
+    async def post(path, body):
+        posts.append(path)
+    stopping._post = post
+
+    heartbeat_task = asyncio.create_task(stopping._heartbeat_loop())
+    await asyncio.sleep(0.05)
+    stopping.stop()
+    # woken by the stop, the loop must not send a heartbeat on a client that is about to go away
+    await asyncio.wait_for(heartbeat_task, timeout=1.0)
+    assert posts == []
+
+def test_default_agent_id_survives_a_restart():
+    config = AgentConfig(server_url="http://127.0.0.1:1", token="secret")
+    assert config.agent_id == socket.gethostname()
+    assert AgentConfig(server_url="http://127.0.0.1:1", token="secret").agent_id == config.agent_id
+
+async def test_restarted_agent_restores_its_snapshot(tmp_path):
+    snapshot_file = os.path.join(tmp_path, "scheduler-{agent_id}.json")
+    # nothing listens on the port, the agent only restores and writes its snapshot
+    first = agent(free_port(), "host", snapshot_file=snapshot_file)
+    first.scheduler().sync(["a", "b"], now=time.time())
+    first.stop()
+    await first.run()
+    assert os.path.exists(os.path.join(tmp_path, "scheduler-host.json"))
+
+    restarted = agent(free_port(), "host", snapshot_file=snapshot_file)
+    restarted.stop()
+    await restarted.run()
+    assert sorted(entry.name for entry in restarted.scheduler().entries()) == ["a", "b"]
+
+async def test_second_agent_with_the_same_id_is_refused(tmp_path):
+    snapshot_file = os.path.join(tmp_path, "scheduler-{agent_id}.json")
+    running = agent(free_port(), "host", snapshot_file=snapshot_file)
+    running_task = asyncio.create_task(running.run())
+    try:
+        await until(lambda: os.path.exists(os.path.join(tmp_path, "scheduler-host.json.lock")))
+        with pytest.raises(RuntimeError, match="distinct agent ids"):
+            await agent(free_port(), "host", snapshot_file=snapshot_file).run()
+        # another id on the same host is fine
+        other = agent(free_port(), "other", snapshot_file=snapshot_file)
+        other.stop()
+        await other.run()
+    finally:
+        running.stop()
+        await asyncio.wait_for(running_task, timeout=5.0)
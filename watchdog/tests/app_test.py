@@ -0,0 +1,81 @@
+import logging, secrets
+
+def watchdog(**fields) -> dict:
+    return {"name": f"test-{secrets.token_hex(4)}", "address": "127.0.0.1", "port": 80, **fields}
+
+def test_create_watchdog(client, login):
+    login()
+    resp = client.post("/watchdogs", json=watchdog())
+    assert resp.status_code == 200
+    assert resp.json()["status"] == "success"
+
+def test_create_invalid_watchdog_is_a_400(client, login):
+    login()
+    resp = client.post("/watchdogs", json={"name": "b"})
+    assert resp.status_code == 400
+    assert resp.json()["status"] == "error"
+    resp = client.post("/watchdogs", json=watchdog(test_method="smtp"))
+    assert resp.status_code == 400
+
+def test_create_duplicate_watchdog_is_a_409(client, login):
+    login()
+    data = watchdog()
+    assert client.post("/watchdogs", json=data).status_code == 200
+    resp = client.post("/watchdogs", json=data)
+    assert resp.status_code == 409
+    assert "already exists" in resp.json()["message"]
+
+def test_query_batch(client, login):
+    login()
+    data = watchdog()
+    queries = [
+        {"type": "create_watchdog", **data},
+        {"type": "update_watchdog", "name": data["name"], "port": 8080},
+        {"type": "select_watchdog", "descriptors": [{"name": {"type": "equals", "value": data["name"]}}]}
+    ]
+    resp = client.post("/query", json=queries)
+    assert resp.status_code == 200
+    assert resp.json()[2][0]["port"] == 8080
+    assert client.post("/query", json=[{"type": "create_watchdog", **data}]).status_code == 409
+    assert client.post("/query", json=[{"type": "select_watchdog", "limit": -1}]).status_code == 400
+    assert client.post("/query", json=[{"type": "unknown"}]).status_code == 400
+
+def test_profile_is_for_admins_only(client, login):
+    login()
+    resp = client.get("/admin/profile", params={"seconds": 0.05})
+    assert resp.status_code == 307
+    assert resp.headers["location"] == "/forbidden"
+
+def test_profile_returns_collapsed_stacks(client, login):
+    login("admin@example.com")
+    resp = client.get("/admin/profile", params={"seconds": 0.05, "interval_ms": 1})
+    assert resp.status_code == 200
+    assert resp.headers["content-disposition"].startswith('attachment; filename="profile-')
+    lines = resp.text.splitlines()
+    assert lines and all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+
+def test_profile_rejects_invalid_duration_and_interval(client, login):
+    login("admin@example.com")
+    for params in ({"seconds": 0}, {"seconds": 3600}, {"interval_ms": 0.001}, {"interval_ms": 0}, {"interval_ms": 5000}):
+        assert client.get("/admin/profile", params={"seconds": 0.05, **params}).status_code == 400
+
+def test_concurrent_profile_is_a_409(client, login, web_app):
+    login("admin@example.com")
+    # a profile already running in this worker holds the lock of the profiler
+    with web_app.profiler._lock:
+        resp = client.get("/admin/profile", params={"seconds": 0.05})
+    assert resp.status_code == 409
+    assert resp.json()["status"] == "error"
+
+def test_slow_requests_are_logged(client, login, web_app, monkeypatch, caplog):
+    login()
+    monkeypatch.setattr(web_app.config.diagnostics, "slow_request_ms", 60000.0)
+    with caplog.at_level(logging.WARNING):
+        client.get("/results")
+    assert not [record for record in caplog.records if "Slow request" in record.getMessage()]
+
+    monkeypatch.setattr(web_app.config.diagnostics, "slow_request_ms", 0.001)
+    with caplog.at_level(logging.WARNING):
+        client.get("/results")
+    slow = [record.getMessage() for record in caplog.records if "Slow request" in record.getMessage()]
+    assert len(slow) == 1 and slow[0].startswith("Slow request: GET /results -> ")
@@ -0,0 +1,31 @@
+import os, tempfile
+
+import pytest
+from fastapi.testclient import TestClient
+
+# the web app reads its config from the environment on import, set it up before any test imports it
+os.environ.setdefault("WATCHDOG_OIDC__ISSUER", "http://127.0.0.1:9")
+os.environ.setdefault("WATCHDOG_OIDC__CLIENT_ID", "test")
+os.environ.setdefault("WATCHDOG_OIDC__CLIENT_S", "test")
+os.environ.setdefault("WATCHDOG_DATA_DIR", tempfile.mkdtemp(prefix="watchdog-test-"))
+os.environ.setdefault("WATCHDOG_LOG_LEVEL", "warning")
+os.environ.setdefault("WATCHDOG_DIAGNOSTICS__ADMIN_EMAILS", '["admin@example.com"]')
+# registers the slow request middleware, tests lower the threshold on the config when they need it
+os.environ.setdefault("WATCHDOG_DIAGNOSTICS__SLOW_REQUEST_MS", "60000")
+
+@pytest.fixture
+def web_app():
+    """The real web app module with its middleware stack, users are set with login()."""
+    from watchdog import app as web_app
+    yield web_app
+    web_app.app.dependency_overrides.clear()
+
+@pytest.fixture
+def client(web_app) -> TestClient:
+    return TestClient(web_app.app, follow_redirects=False)
+
+@pytest.fixture
+def login(web_app):
+    def login(email: str = "user@example.com") -> None:
+        web_app.app.dependency_overrides[web_app.oidc.get_current_user] = lambda: {"email": email}
+    return login
@@ -0,0 +1,76 @@
+import os
+
+import pytest
+from pydantic import TypeAdapter, ValidationError
+
+from watchdog.db import Db
+from watchdog.data.select_watchdog import SelectWatchdog
+from watchdog.data.create_watchdog import CreateWatchdog
+from watchdog.data.update_watchdog import UpdateWatchdog
+from watchdog.data.delete_watchdogs import DeleteWatchdogs
+from watchdog.data.watchdog_query import WatchdogQuery
+
+query_adapter = TypeAdapter(list[WatchdogQuery])
+
+def create(name: str) -> CreateWatchdog:
+    return CreateWatchdog(name=name, address="127.0.0.1", port=80)
+
+async def test_batch_is_parsed_by_type(tmp_path):
+    queries = query_adapter.validate_json("""[
+        {"type": "create_watchdog", "name": "a", "address": "127.0.0.1", "port": 80},
+        {"type": "update_watchdog", "name": "a", "port": 8080},
+        {"type": "select_watchdog", "descriptors": [{"name": {"type": "equals", "value": "a"}}]},
+        {"type": "delete_watchdogs", "names": ["a"]}
+    ]""")
+    assert [type(query) for query in queries] == [CreateWatchdog, UpdateWatchdog, SelectWatchdog, DeleteWatchdogs]
+
+    results = await Db(str(tmp_path)).run(queries)
+    assert results[0].port == 80
+    assert [watchdog.port for watchdog in results[2]] == [8080]
+    assert results[3] == 1
+
+async def test_batch_writes_once(tmp_path, monkeypatch):
+    db = Db(str(tmp_path))
+    saves = []
+    save = db._codec.save
+    monkeypatch.setattr(db._codec, "save", lambda path, watchdogs: saves.append(path) or save(path, watchdogs))
+
+    await db.run([create("a"), create("b"), UpdateWatchdog(name="a", enabled=False)])
+    assert len(saves) == 1
+
+    await db.run([SelectWatchdog(), SelectWatchdog()])
+    assert len(saves) == 1
+
+async def test_failed_batch_writes_nothing(tmp_path):
+    db = Db(str(tmp_path))
+    await db.execute(create("a"))
+    with open(os.path.join(tmp_path, "data.json"), "rb") as f:
+        before = f.read()
+
+    with pytest.raises(ValueError):
+        await db.run([create("b"), create("a")])
+    with pytest.raises(ValueError):
+        await db.run([DeleteWatchdogs(names=["a"]), UpdateWatchdog(name="missing", port=1)])
+
+    with open(os.path.join(tmp_path, "data.json"), "rb") as f:
+        assert f.read() == before
+    assert [watchdog.name for watchdog in await db.execute(SelectWatchdog())] == ["a"]
+
+async def test_enqueue_and_commit(tmp_path):
+    db = Db(str(tmp_path))
+    db.enqueue(create("a"))
+    db.enqueue(create("b"))
+    with pytest.raises(ValueError):
+        db.enqueue(SelectWatchdog())
+    await db.commit()
+    assert [watchdog.name for watchdog in await db.execute(SelectWatchdog())] == ["a", "b"]
+
+async def test_select_limit_and_offset(tmp_path):
+    db = Db(str(tmp_path))
+    await db.run([create(name) for name in "abcde"])
+    selected = await db.execute(SelectWatchdog(offset=1, limit=2))
+    assert [watchdog.name for watchdog in selected] == ["b", "c"]
+    with pytest.raises(ValidationError):
+        SelectWatchdog(limit=-1)
+    with pytest.raises(ValidationError):
+        SelectWatchdog(offset=-1)
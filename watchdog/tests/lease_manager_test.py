@@ -0,0 +1,107 @@
+import gzip
+
+import pytest
+from pydantic import ValidationError
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from watchdog.db import Db
+from watchdog.lease_manager import LeaseManager
+from watchdog.result_store import ResultStore
+from watchdog.data.agents_config import AgentsConfig
+from watchdog.data.create_watchdog import CreateWatchdog
+from watchdog.data.heartbeat import Heartbeat
+from watchdog.data.lease_request import LeaseRequest
+from watchdog.data.probe_result import ProbeResult
+from watchdog.data.probe_result_batch import ProbeResultBatch
+from watchdog.data.web_app_config import WebAppConfig
+
+async def lease_manager(tmp_path, names=("a", "b", "c"), **config) -> LeaseManager:
+    db = Db(str(tmp_path))
+    await db.run([CreateWatchdog(name=name, address="127.0.0.1", port=80) for name in names])
+    config = AgentsConfig(**{"token": "secret", "lease_ttl_seconds": 30.0, "lease_max_age_seconds": 600.0, **config})
+    return LeaseManager(config, db, ResultStore(str(tmp_path)))
+
+def leased_names(lease) -> list:
+    return [watchdog.name for watchdog in lease.watchdogs]
+
+async def test_acquire_hands_out_each_watchdog_once(tmp_path):
+    manager = await lease_manager(tmp_path)
+    first = await manager.acquire(LeaseRequest(agent_id="agent-1", max_watchdogs=2), now=0.0)
+    second = await manager.acquire(LeaseRequest(agent_id="agent-2", max_watchdogs=2), now=0.0)
+    third = await manager.acquire(LeaseRequest(agent_id="agent-3", max_watchdogs=2), now=0.0)
+    assert leased_names(first) == ["a", "b"]
+    assert leased_names(second) == ["c"]
+    assert third.watchdogs == []
+    assert len(manager.leases()) == 2
+
+async def test_expired_lease_frees_its_watchdogs(tmp_path):
+    manager = await lease_manager(tmp_path)
+    lease = await manager.acquire(LeaseRequest(agent_id="agent-1"), now=0.0)
+    renewed = await manager.renew(Heartbeat(agent_id="agent-1", lease_ids=[lease.lease_id]), now=20.0)
+    assert renewed.lease_ids == [lease.lease_id]
+
+    # renewed at 20s, so still held at 45s and expired after 50s
+    assert (await manager.acquire(LeaseRequest(agent_id="agent-2"), now=45.0)).watchdogs == []
+    assert leased_names(await manager.acquire(LeaseRequest(agent_id="agent-2"), now=51.0)) == ["a", "b", "c"]
+    renewed = await manager.renew(Heartbeat(agent_id="agent-1", lease_ids=[lease.lease_id]), now=52.0)
+    assert renewed.lease_ids == []
+
+async def test_renew_only_renews_own_leases(tmp_path):
+    manager = await lease_manager(tmp_path)
+    lease = await manager.acquire(LeaseRequest(agent_id="agent-1"), now=0.0)
+    renewed = await manager.renew(Heartbeat(agent_id="agent-2", lease_ids=[lease.lease_id, "unknown"]), now=1.0)
+    assert renewed.lease_ids == []
+
+async def test_lease_past_max_age_is_released_on_renew(tmp_path):
+    manager = await lease_manager(tmp_path, lease_max_age_seconds=60.0)
+    lease = await manager.acquire(LeaseRequest(agent_id="agent-1"), now=0.0)
+    for now in (20.0, 40.0, 60.0):
+        assert (await manager.renew(Heartbeat(agent_id="agent-1", lease_ids=[lease.lease_id]), now=now)).lease_ids
+    refused = await manager.renew(Heartbeat(agent_id="agent-1", lease_ids=[lease.lease_id]), now=61.0)
+    assert refused.lease_ids == []
+    # the watchdogs are free right away, not only after the ttl of the refused lease ran out
+    assert manager.leases() == []
+    assert leased_names(await manager.acquire(LeaseRequest(agent_id="agent-2"), now=61.0)) == ["a", "b", "c"]
+
+async def test_report_stores_results_of_held_lease(tmp_path):
+    manager = await lease_manager(tmp_path)
+    lease = await manager.acquire(LeaseRequest(agent_id="agent-1", max_watchdogs=1), now=0.0)
+    results = [ProbeResult(name="a", success=True), ProbeResult(name="b", success=False)]
+
+    assert await manager.report(ProbeResultBatch(agent_id="agent-2", lease_id=lease.lease_id, results=results)) is None
+    assert await manager.report(ProbeResultBatch(agent_id="agent-1", lease_id="unknown", results=results)) is None
+    # only results of watchdogs in the lease are accepted
+    assert await manager.report(ProbeResultBatch(agent_id="agent-1", lease_id=lease.lease_id, results=results)) == 1
+    latest = await ResultStore(str(tmp_path)).latest()
+    assert list(latest) == ["a"]
+    assert latest["a"].success
+
+async def test_routes(tmp_path):
+    manager = await lease_manager(tmp_path)
+    app = FastAPI()
+    app.include_router(manager.get_router())
+    client = TestClient(app)
+    auth = {"Authorization": "Bearer secret"}
+
+    assert client.post("/agent/lease", content=LeaseRequest(agent_id="agent-1").model_dump_json()).status_code == 401
+    assert client.post("/agent/lease", headers={"Authorization": "Bearer wrong"}, content=b"{}").status_code == 401
+    assert client.post("/agent/lease", headers=auth, content=b"{}").status_code == 400
+
+    body = gzip.compress(LeaseRequest(agent_id="agent-1").model_dump_json().encode())
+    resp = client.post("/agent/lease", headers={**auth, "Content-Encoding": "gzip"}, content=body)
+    assert resp.status_code == 200
+    lease_id = resp.json()["lease_id"]
+
+    batch = ProbeResultBatch(agent_id="agent-1", lease_id=lease_id, results=[ProbeResult(name="a", success=True)])
+    resp = client.post("/agent/results", headers=auth, content=batch.model_dump_json())
+    assert resp.json() == {"accepted": 1}
+    batch.lease_id = "unknown"
+    assert client.post("/agent/results", headers=auth, content=batch.model_dump_json()).status_code == 409
+
+def test_agents_refuse_several_app_workers():
+    oidc = {"issuer": "http://127.0.0.1:9", "client_id": "test", "client_s": "test"}
+    assert WebAppConfig(oidc=oidc, agents={"token": "secret"}, workers=1).workers == 1
+    assert WebAppConfig(oidc=oidc, workers=4).workers == 4
+    with pytest.raises(ValidationError):
+        WebAppConfig(oidc=oidc, agents={"token": "secret"}, workers=4)
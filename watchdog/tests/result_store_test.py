@@ -0,0 +1,32 @@
+from watchdog.result_store import ResultStore
+from watchdog.data.probe_result import ProbeResult
+from watchdog.data.probe_timings import ProbeTimings
+
+async def test_latest_result_with_timings_is_stored(tmp_path):
+    store = ResultStore(str(tmp_path))
+    assert await store.latest() == {}
+
+    timings = ProbeTimings(dns_ms=1.0, connect_ms=2.0, tls_ms=3.0, ttfb_ms=4.0, total_ms=10.0)
+    await store.update([ProbeResult(name="a", success=True, timings=timings, timestamp=100.0)])
+    await store.update([ProbeResult(name="b", success=False, detail="status 503", timestamp=100.0)])
+
+    # a new store reads what the other one wrote, e.g. another app worker
+    latest = await ResultStore(str(tmp_path)).latest()
+    assert sorted(latest) == ["a", "b"]
+    assert latest["a"].timings == timings
+    assert latest["b"].detail == "status 503"
+
+async def test_older_results_do_not_replace_newer_ones(tmp_path):
+    store = ResultStore(str(tmp_path))
+    await store.update([ProbeResult(name="a", success=True, timestamp=200.0)])
+    await store.update([ProbeResult(name="a", success=False, timestamp=100.0)])
+    assert (await store.latest())["a"].success
+    await store.update([ProbeResult(name="a", success=False, timestamp=300.0)])
+    assert not (await store.latest())["a"].success
+
+async def test_invalid_file_is_discarded(tmp_path):
+    (tmp_path / "results.json").write_text("not json")
+    store = ResultStore(str(tmp_path))
+    assert await store.latest() == {}
+    await store.update([ProbeResult(name="a", success=True)])
+    assert list(await store.latest()) == ["a"]
@@ -0,0 +1,44 @@
+import threading, time
+
+import pytest
+
+from watchdog.sampling_profiler import SamplingProfiler
+
+def spin(stop: threading.Event) -> None:
+    while not stop.is_set():
+        time.sleep(0.001)
+
+def test_collapsed_stacks_of_other_threads():
+    stop = threading.Event()
+    thread = threading.Thread(target=spin, args=(stop,), name="spinner")
+    thread.start()
+    try:
+        collapsed = SamplingProfiler().profile(0.1, 0.001)
+    finally:
+        stop.set()
+        thread.join()
+    lines = collapsed.splitlines()
+    stacks = {}
+    for line in lines:
+        stack, count = line.rsplit(" ", 1)
+        stacks[stack] = int(count)
+    # one line per distinct stack, the thread name first and the innermost frame last
+    assert len(stacks) == len(lines)
+    assert any(stack.startswith("spinner;") and stack.endswith("spin (sampling_profiler_test.py)") for stack in stacks)
+    # the profiling thread does not sample itself
+    assert not any("SamplingProfiler.profile" in stack for stack in stacks)
+    assert list(stacks.values()) == sorted(stacks.values(), reverse=True)
+
+def test_one_profile_at_a_time():
+    profiler = SamplingProfiler()
+    thread = threading.Thread(target=profiler.profile, args=(0.3,))
+    thread.start()
+    try:
+        while not profiler.busy():
+            time.sleep(0.001)
+        with pytest.raises(RuntimeError):
+            profiler.profile(0.01)
+    finally:
+        thread.join()
+    assert not profiler.busy()
+    profiler.profile(0.01)
@@ -0,0 +1,98 @@
+import os
+
+from watchdog.scheduler import Scheduler
+from watchdog.data.probe_result import ProbeResult
+from watchdog.data.schedule_entry import ScheduleEntry
+
+def test_new_watchdogs_are_due_right_away():
+    scheduler = Scheduler(interval_seconds=30.0)
+    scheduler.sync(["a", "b"], now=1000.0)
+    assert scheduler.due(["a", "b", "unknown"], now=1000.0) == ["a", "b"]
+    assert scheduler.next_due(["a", "b"]) == 1000.0
+
+def test_probe_is_due_again_after_interval():
+    scheduler = Scheduler(interval_seconds=30.0)
+    scheduler.sync(["a"], now=1000.0)
+    scheduler.record(ProbeResult(name="a", success=True), now=1000.0)
+    assert scheduler.due(["a"], now=1029.0) == []
+    assert scheduler.due(["a"], now=1030.0) == ["a"]
+
+def test_failures_back_off_exponentially_up_to_max_level():
+    scheduler = Scheduler(interval_seconds=10.0, max_backoff_level=3)
+    scheduler.sync(["a"], now=0.0)
+    delays = []
+    for _ in range(5):
+        scheduler.record(ProbeResult(name="a", success=False), now=0.0)
+        delays.append(scheduler.next_due(["a"]))
+    assert delays == [10.0, 20.0, 40.0, 40.0, 40.0]
+    entry = scheduler.entries()[0]
+    assert entry.backoff_level == 3 and entry.last_success is False
+
+    scheduler.record(ProbeResult(name="a", success=True), now=0.0)
+    assert scheduler.next_due(["a"]) == 10.0
+    assert scheduler.entries()[0].backoff_level == 0
+
+def test_results_of_untracked_watchdogs_are_ignored():
+    scheduler = Scheduler(interval_seconds=10.0)
+    scheduler.record(ProbeResult(name="a", success=True), now=0.0)
+    assert scheduler.entries() == []
+
+def test_unleased_entries_are_pruned_after_retention():
+    scheduler = Scheduler(interval_seconds=10.0, retention_seconds=100.0)
+    scheduler.sync(["a", "b"], now=0.0)
+    # b is no longer leased but kept for a while, e.g. it may come back with the next lease
+    scheduler.sync(["a"], now=50.0)
+    assert sorted(entry.name for entry in scheduler.entries()) == ["a", "b"]
+    scheduler.sync(["a"], now=100.0)
+    assert sorted(entry.name for entry in scheduler.entries()) == ["a", "b"]
+    scheduler.sync(["a"], now=101.0)
+    assert [entry.name for entry in scheduler.entries()] == ["a"]
+
+def test_snapshot_replaces_file(tmp_path):
+    path = os.path.join(tmp_path, "scheduler.json")
+    scheduler = Scheduler(interval_seconds=30.0)
+    scheduler.sync(["a"], now=0.0)
+    scheduler.snapshot(path)
+    scheduler.sync(["a", "b"], now=1.0)
+    scheduler.snapshot(path)
+    assert os.listdir(tmp_path) == ["scheduler.json"]
+
+    restored = Scheduler(interval_seconds=30.0)
+    restored.restore(path, now=2.0)
+    assert sorted(entry.name for entry in restored.entries()) == ["a", "b"]
+
+def test_restore_spreads_overdue_probes_over_ramp_up(tmp_path):
+    path = os.path.join(tmp_path, "scheduler.json")
+    entries = [
+        ScheduleEntry(name="late", next_due=900.0, backoff_level=2, last_leased=900.0),
+        ScheduleEntry(name="later", next_due=950.0, last_leased=900.0),
+        ScheduleEntry(name="latest", next_due=990.0, last_leased=900.0),
+        ScheduleEntry(name="future", next_due=1500.0, last_leased=900.0)
+    ]
+    with open(path, "wb") as f:
+        f.write(Scheduler._adapter.dump_json(entries))
+
+    scheduler = Scheduler(interval_seconds=30.0, ramp_up_seconds=60.0)
+    scheduler.restore(path, now=1000.0)
+    restored = {entry.name: entry for entry in scheduler.entries()}
+    # overdue probes keep their order and are spread evenly over the window, the others keep their due time
+    assert restored["late"].next_due == 1000.0
+    assert restored["later"].next_due == 1020.0
+    assert restored["latest"].next_due == 1040.0
+    assert restored["future"].next_due == 1500.0
+    assert restored["late"].backoff_level == 2
+
+    # watchdogs new to the agent during the ramp up are spread over the rest of the window
+    scheduler.sync(["new"], now=1010.0)
+    assert 1010.0 <= scheduler.next_due(["new"]) <= 1060.0
+
+def test_restore_without_or_with_broken_snapshot(tmp_path):
+    scheduler = Scheduler(interval_seconds=30.0)
+    scheduler.restore(os.path.join(tmp_path, "missing.json"), now=0.0)
+    assert scheduler.entries() == []
+
+    path = os.path.join(tmp_path, "broken.json")
+    with open(path, "w") as f:
+        f.write("[{")
+    scheduler.restore(path, now=0.0)
+    assert scheduler.entries() == []
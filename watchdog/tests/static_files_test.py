@@ -0,0 +1,77 @@
+import secrets
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from watchdog.static_files import PrecompressedStaticFiles, brotli
+
+content = b"body { color: black; }\n" * 100
+
+def client(tmp_path) -> TestClient:
+    (tmp_path / "style.css").write_bytes(content)
+    app = FastAPI()
+    app.mount("/static", PrecompressedStaticFiles(directory=str(tmp_path)), name="static")
+    return TestClient(app)
+
+def get(client: TestClient, accept_encoding: str, **headers):
+    return client.get("/static/style.css", headers={"Accept-Encoding": accept_encoding, **headers})
+
+def test_encoding_selection(tmp_path):
+    c = client(tmp_path)
+    assert "content-encoding" not in get(c, "identity").headers
+    assert get(c, "gzip").headers["content-encoding"] == "gzip"
+    assert get(c, "deflate, gzip;q=0.5").headers["content-encoding"] == "gzip"
+    assert get(c, "*").headers["content-encoding"] in ("gzip", "br")
+    # q=0 refuses an encoding
+    for refused in ("gzip;q=0", "gzip; q=0.0, deflate", "*;q=0", "br;q=0, gzip;q=0"):
+        resp = get(c, refused)
+        assert "content-encoding" not in resp.headers
+        assert resp.content == content
+
+def test_etag_per_encoding(tmp_path):
+    c = client(tmp_path)
+    identity = get(c, "identity")
+    gzipped = get(c, "gzip")
+    assert identity.headers["etag"] != gzipped.headers["etag"]
+    # the test client decodes the gzip body
+    assert gzipped.content == content
+
+    assert get(c, "gzip", **{"If-None-Match": gzipped.headers["etag"]}).status_code == 304
+    # a cached gzip representation does not validate the identity one and vice versa
+    assert get(c, "identity", **{"If-None-Match": gzipped.headers["etag"]}).status_code == 200
+    assert get(c, "gzip", **{"If-None-Match": identity.headers["etag"]}).status_code == 200
+
+def test_app_middleware_keeps_static_negotiation(client):
+    # the full middleware stack of the app, not only the mounted static files
+    for accept_encoding in ("gzip;q=0", "br;q=1, gzip;q=0", "identity"):
+        resp = client.get("/static/style.css", headers={"Accept-Encoding": accept_encoding})
+        assert resp.status_code == 200
+        assert resp.headers.get("content-encoding") in (None, "br")
+        assert "-gzip" not in resp.headers["etag"]
+        assert resp.headers.get_list("vary") == ["Accept-Encoding"]
+
+    gzipped = client.get("/static/style.css", headers={"Accept-Encoding": "gzip"})
+    assert gzipped.headers["content-encoding"] == "gzip"
+    assert gzipped.headers["etag"].endswith('-gzip"')
+    assert gzipped.headers.get_list("vary") == ["Accept-Encoding"]
+
+@pytest.mark.skipif(brotli is None, reason="brotli is not installed")
+def test_app_serves_brotli_variant(client):
+    resp = client.get("/static/style.css", headers={"Accept-Encoding": "br;q=1, gzip;q=0"})
+    assert resp.headers["content-encoding"] == "br"
+    assert resp.headers["etag"].endswith('-br"')
+
+def test_app_gzips_large_responses_only_when_accepted(client, login):
+    login()
+    names = [f"gzip-{secrets.token_hex(4)}" for _ in range(20)]
+    queries = [{"type": "create_watchdog", "name": name, "address": "127.0.0.1", "port": 80} for name in names]
+    assert client.post("/query", json=queries).status_code == 200
+    select = [{"type": "select_watchdog", "descriptors": [{"name": {"type": "in", "values": names}}]}]
+
+    resp = client.post("/query", json=select, headers={"Accept-Encoding": "gzip"})
+    assert resp.headers["content-encoding"] == "gzip"
+    assert len(resp.json()[0]) == 20
+    for refused in ("gzip;q=0", "*;q=0", "identity"):
+        resp = client.post("/query", json=select, headers={"Accept-Encoding": refused})
+        assert "content-encoding" not in resp.headers
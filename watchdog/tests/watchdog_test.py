@@ -0,0 +1,186 @@
+import datetime, ipaddress, re, socket, ssl
+
+import pytest
+from aiohttp import web
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.x509.oid import NameOID
+
+from watchdog import watchdog as watchdog_module
+from watchdog.watchdog import Watchdog, _BodyMatcher, _TimedSSLObject
+from watchdog.data.http_check import HttpCheck
+from watchdog.data.watchdog import Watchdog as Data
+
+def feed(matcher: _BodyMatcher, body: bytes, chunk_size: int) -> _BodyMatcher:
+    for i in range(0, len(body), chunk_size):
+        matcher.feed(body[i:i + chunk_size])
+        if matcher.decided():
+            break
+    matcher.finish()
+    return matcher
+
+def test_contains_across_chunk_borders():
+    body = b"x" * 1000 + b"needle" + b"x" * 1000
+    for chunk_size in (1, 2, 3, 5, 7, 1000, 1003, 4096):
+        assert feed(_BodyMatcher(HttpCheck(body_contains="needle")), body, chunk_size).contains_found
+        assert not feed(_BodyMatcher(HttpCheck(body_contains="needles")), body, chunk_size).contains_found
+
+def test_regex_across_chunk_borders():
+    body = b"x" * 5000 + b"version: 1.2.3" + b"x" * 5000
+    for chunk_size in (1, 3, 4096, 5003, 20000):
+        assert feed(_BodyMatcher(HttpCheck(body_regex=r"version: \d+\.\d+\.\d+")), body, chunk_size).regex_found
+        assert not feed(_BodyMatcher(HttpCheck(body_regex=r"version: 2")), body, chunk_size).regex_found
+
+def test_regex_at_the_end_is_found_on_finish():
+    matcher = _BodyMatcher(HttpCheck(body_regex="end$"))
+    matcher.feed(b"the end")
+    assert not matcher.regex_found
+    matcher.finish()
+    assert matcher.regex_found
+
+def test_tiny_chunks_do_not_rescan_on_every_chunk():
+    class CountingRegex:
+        def __init__(self, pattern: bytes):
+            self.regex = re.compile(pattern)
+            self.searches = 0
+        def search(self, buffer):
+            self.searches += 1
+            return self.regex.search(buffer)
+
+    matcher = _BodyMatcher(HttpCheck(body_regex="missing"))
+    matcher._regex = CountingRegex(b"missing")
+    feed(matcher, b"x" * 65536, 1)
+    assert not matcher.regex_found
+    assert matcher._regex.searches == 65536 // _BodyMatcher.regex_step
+
+def test_empty_needle_matches_empty_body():
+    matcher = _BodyMatcher(HttpCheck(body_contains=""))
+    assert matcher.decided()
+    assert feed(matcher, b"", 1).contains_found
+
+async def serve(body: bytes, chunk_size: int, ssl_context: ssl.SSLContext = None) -> web.AppRunner:
+    async def handler(request):
+        response = web.StreamResponse()
+        await response.prepare(request)
+        for i in range(0, len(body), chunk_size):
+            await response.write(body[i:i + chunk_size])
+        await response.write_eof()
+        return response
+
+    app = web.Application()
+    app.router.add_get("/", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", 0, ssl_context=ssl_context).start()
+    return runner
+
+async def probe(runner: web.AppRunner, **check) -> tuple:
+    port = runner.addresses[0][1]
+    result = await Watchdog(Data(name="local", address="127.0.0.1", port=port, test_method="http", http_check=HttpCheck(**check))).run()
+    return result.success, result.detail
+
+async def test_body_checks_on_streamed_body():
+    runner = await serve(b"x" * 3000 + b"ready" + b"x" * 3000, 7)
+    try:
+        assert (await probe(runner, body_contains="ready"))[0]
+        assert (await probe(runner, body_regex="re+ady"))[0]
+        # the match lies beyond the cap
+        assert await probe(runner, body_contains="ready", max_body_bytes=1000) == (False, "body does not contain 'ready' within 1000 bytes")
+        assert await probe(runner, body_regex="ready", max_body_bytes=3004) == (False, "body does not match 'ready' within 3004 bytes")
+        assert (await probe(runner, body_regex="ready", max_body_bytes=3005))[0]
+    finally:
+        await runner.cleanup()
+
+async def test_empty_needle_on_empty_body():
+    runner = await serve(b"", 1)
+    try:
+        assert (await probe(runner, body_contains=""))[0]
+    finally:
+        await runner.cleanup()
+
+@pytest.fixture
+def server_ssl_context(tmp_path, monkeypatch) -> ssl.SSLContext:
+    """Self-signed certificate for localhost, trusted by the ssl context of the probes."""
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "localhost")])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name).issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - datetime.timedelta(minutes=1))
+        .not_valid_after(now + datetime.timedelta(hours=1))
+        .add_extension(x509.SubjectAlternativeName([x509.DNSName("localhost"), x509.IPAddress(ipaddress.ip_address("127.0.0.1"))]), critical=False)
+        .add_extension(x509.BasicConstraints(ca=True, path_length=None), critical=True)
+        .sign(key, hashes.SHA256())
+    )
+    cert_pem = cert.public_bytes(serialization.Encoding.PEM)
+    (tmp_path / "cert.pem").write_bytes(cert_pem)
+    (tmp_path / "key.pem").write_bytes(key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()))
+
+    client_context = ssl.create_default_context(cadata=cert_pem.decode())
+    client_context.sslobject_class = _TimedSSLObject
+    monkeypatch.setattr(watchdog_module, "_ssl_context", client_context)
+
+    server_context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+    server_context.load_cert_chain(tmp_path / "cert.pem", tmp_path / "key.pem")
+    return server_context
+
+async def timed_probe(test_method: str, port: int):
+    # localhost instead of an ip address, so the probe has to resolve the name
+    return await Watchdog(Data(name="local", address="localhost", port=port, test_method=test_method)).run()
+
+async def test_http_timings():
+    runner = await serve(b"ok", 2)
+    try:
+        result = await timed_probe("http", runner.addresses[0][1])
+    finally:
+        await runner.cleanup()
+    assert result.success, result.detail
+    timings = result.timings
+    assert timings.dns_ms is not None and timings.connect_ms is not None and timings.ttfb_ms is not None
+    assert timings.tls_ms is None
+    assert timings.total_ms >= timings.ttfb_ms
+
+async def test_https_timings(server_ssl_context):
+    runner = await serve(b"ok", 2, server_ssl_context)
+    try:
+        result = await timed_probe("https", runner.addresses[0][1])
+    finally:
+        await runner.cleanup()
+    assert result.success, result.detail
+    timings = result.timings
+    assert None not in (timings.dns_ms, timings.connect_ms, timings.tls_ms, timings.ttfb_ms, timings.total_ms)
+    assert timings.total_ms >= timings.tls_ms
+
+async def test_https_with_untrusted_certificate_fails(server_ssl_context, monkeypatch):
+    monkeypatch.setattr(watchdog_module, "_ssl_context", ssl.create_default_context())
+    runner = await serve(b"ok", 2, server_ssl_context)
+    try:
+        result = await timed_probe("https", runner.addresses[0][1])
+    finally:
+        await runner.cleanup()
+    assert not result.success
+    assert "certificate" in result.detail.lower()
+
+async def test_tcp_timings():
+    runner = await serve(b"", 1)
+    try:
+        result = await timed_probe("tcp", runner.addresses[0][1])
+    finally:
+        await runner.cleanup()
+    assert result.success, result.detail
+    assert result.timings.dns_ms is not None and result.timings.connect_ms is not None
+    assert result.timings.total_ms >= result.timings.connect_ms
+
+async def test_tcp_to_closed_port_fails_with_timings():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    result = await timed_probe("tcp", port)
+    assert not result.success
+    assert result.timings.dns_ms is not None and result.timings.total_ms is not None
+    assert result.timings.connect_ms is None
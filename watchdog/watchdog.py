@@ -1,31 +1,121 @@
-from typing import Literal
-
-from .functor import Functor
-import subprocess
-import socket
-import requests
-import requests
+from typing import Literal, Optional
 import asyncio
+import logging
 import platform
+import re
+import socket
+import ssl
+import time
+from contextvars import ContextVar
+
 import aiohttp
 
+from .functor import Functor
 from .data.watchdog import Watchdog as Data
+from .data.probe_result import ProbeResult
+from .data.probe_timings import ProbeTimings
+from .data.http_check import HttpCheck
+
+# marks of the probe running in the current task, transport callbacks inherit it from the task opening the connection
+_marks: ContextVar[Optional[dict]] = ContextVar("marks", default=None)
+
+class _TimedSSLObject(ssl.SSLObject):
+    """Marks when the TLS handshake of a connection starts and completes."""
+
+    def do_handshake(self) -> None:
+        marks = _marks.get()
+        if marks is not None:
+            marks.setdefault("tls_start", time.monotonic())
+        super().do_handshake()
+        if marks is not None:
+            marks.setdefault("tls_end", time.monotonic())
+
+_ssl_context = ssl.create_default_context()
+_ssl_context.sslobject_class = _TimedSSLObject
+
+def _ms(start: Optional[float], end: Optional[float]) -> Optional[float]:
+    if start is None or end is None:
+        return None
+    return (end - start) * 1000.0
+
+def _trace_config() -> aiohttp.TraceConfig:
+    # every hook stores the first time its phase was reached in the trace_request_ctx dict of the request
+    def mark(name: str):
+        async def on_event(session, trace_config_ctx, params):
+            trace_config_ctx.trace_request_ctx.setdefault(name, time.monotonic())
+        return on_event
+
+    trace_config = aiohttp.TraceConfig()
+    trace_config.on_dns_resolvehost_start.append(mark("dns_start"))
+    trace_config.on_dns_resolvehost_end.append(mark("dns_end"))
+    trace_config.on_connection_create_start.append(mark("connect_start"))
+    trace_config.on_connection_create_end.append(mark("connect_end"))
+    trace_config.on_request_headers_sent.append(mark("request_sent"))
+    return trace_config
+
+class _BodyMatcher:
+    """Evaluates the body checks of a http check chunk by chunk, keeping at most max_body_bytes in memory.
+
+    The regex is searched again only once the buffer grew by regex_step bytes and a last time in finish(),
+    so a body sent in tiny chunks does not rescan the whole buffer on every chunk."""
+
+    regex_step = 4096
+
+    def __init__(self, check: HttpCheck):
+        self._needle = check.body_contains.encode() if check.body_contains is not None else None
+        self._regex = re.compile(check.body_regex.encode()) if check.body_regex is not None else None
+        self._tail = b""
+        self._buffer = bytearray()
+        self._searched = 0
+        # an empty needle is contained in every body, even an empty one
+        self.contains_found = not self._needle
+        self.regex_found = self._regex is None
+
+    def decided(self) -> bool:
+        return self.contains_found and self.regex_found
+
+    def feed(self, chunk: bytes) -> None:
+        if not self.contains_found:
+            # keep the end of the previous chunk so matches across chunk borders are found
+            window = self._tail + chunk
+            self.contains_found = self._needle in window
+            self._tail = window[max(0, len(window) - len(self._needle) + 1):]
+        if not self.regex_found:
+            self._buffer += chunk
+            if len(self._buffer) - self._searched >= self.regex_step:
+                self._search()
+
+    def finish(self) -> None:
+        """Called once no more chunks follow, at the end of the body or when max_body_bytes is reached."""
+        if not self.regex_found and self._searched < len(self._buffer):
+            self._search()
+
+    def _search(self) -> None:
+        self._searched = len(self._buffer)
+        self.regex_found = self._regex.search(self._buffer) is not None
+
+class Watchdog(Functor[ProbeResult]):
 
-class Watchdog(Functor[None]):
-        
     def __init__(self, data:Data):
         self._data = data
-    
-    async def run(self) -> None:
+
+    async def run(self) -> ProbeResult:
         method = self._data.test_method
         func = getattr(self, f"_run_{method}", None)
         if func is not None:
-            await func()
+            return await func()
         else:
             raise ValueError(f"Unknown test method: {self._data.test_method}")
 
-    async def _run_ping(self):
+    def _result(self, success: bool, detail: Optional[str] = None, timings: Optional[ProbeTimings] = None) -> ProbeResult:
+        result = ProbeResult(name=self._data.name, success=success, detail=detail, timings=timings)
+        logging.debug(f"{self._data.test_method} probe {self._data.name} ({self._data.address}:{self._data.port}): "
+                      f"success={success} detail={detail} timings={timings}")
+        return result
+
+    async def _run_ping(self) -> ProbeResult:
         # Use system ping asynchronously
+        start = time.monotonic()
         try:
             ping_cmd = ["ping", "-n" if platform.system() == "Windows" else "-c", "1", self._data.address]
             proc = await asyncio.create_subprocess_exec(
@@ -34,34 +124,102 @@ class Watchdog(Functor[None]):
                 stderr=asyncio.subprocess.PIPE
             )
             _, _ = await proc.communicate()
+            timings = ProbeTimings(total_ms=_ms(start, time.monotonic()))
             if proc.returncode == 0:
-                print(f"Ping to {self._data.address} succeeded.")
+                return self._result(True, timings=timings)
             else:
-                print(f"Ping to {self._data.address} failed.")
+                return self._result(False, f"ping exited with code {proc.returncode}", timings)
         except Exception as e:
-            print(f"Ping error: {e}")
+            return self._result(False, str(e), ProbeTimings(total_ms=_ms(start, time.monotonic())))
 
-    async def _run_tcp(self):
+    async def _run_tcp(self) -> ProbeResult:
+        start = time.monotonic()
+        dns_end = None
         try:
-            reader, writer = await asyncio.open_connection(self._data.address, self._data.port)
-            print(f"TCP connection to {self._data.address}:{self._data.port} succeeded.")
+            addr_infos = await asyncio.get_running_loop().getaddrinfo(
+                self._data.address, self._data.port, type=socket.SOCK_STREAM)
+            dns_end = time.monotonic()
+            error = None
+            for _, _, _, _, sockaddr in addr_infos:
+                try:
+                    reader, writer = await asyncio.open_connection(sockaddr[0], self._data.port)
+                    break
+                except OSError as e:
+                    error = e
+            else:
+                raise error
+            connect_end = time.monotonic()
             writer.close()
             await writer.wait_closed()
+            timings = ProbeTimings(dns_ms=_ms(start, dns_end), connect_ms=_ms(dns_end, connect_end),
+                                   total_ms=_ms(start, time.monotonic()))
+            return self._result(True, timings=timings)
         except Exception as e:
-            print(f"TCP connection to {self._data.address}:{self._data.port} failed: {e}")
+            timings = ProbeTimings(dns_ms=_ms(start, dns_end), total_ms=_ms(start, time.monotonic()))
+            return self._result(False, str(e), timings)
 
-    async def _run_http(self):
-        try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(f"http://{self._data.address}:{self._data.port}", timeout=5) as response:
-                    print(f"HTTP GET {self._data.address}:{self._data.port} status: {response.status}")
-        except Exception as e:
-            print(f"HTTP request failed: {e}")
+    async def _run_http(self) -> ProbeResult:
+        return await self._request("http")
 
-    async def _run_https(self):
+    async def _run_https(self) -> ProbeResult:
+        return await self._request("https")
+
+    async def _request(self, scheme: Literal["http", "https"]) -> ProbeResult:
+        check = self._data.http_check
+        marks = {}
+        _marks.set(marks)
+        start = time.monotonic()
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(f"https://{self._data.address}:{self._data.port}", timeout=5) as response:
-                    print(f"HTTPS GET {self._data.address}:{self._data.port} status: {response.status}")
+            async with aiohttp.ClientSession(trace_configs=[_trace_config()]) as session:
+                url = f"{scheme}://{self._data.address}:{self._data.port}{check.path}"
+                async with session.request(check.method, url, timeout=5, ssl=_ssl_context, trace_request_ctx=marks) as response:
+                    marks["response_start"] = time.monotonic()
+                    success, detail = await self._check_response(check, response)
         except Exception as e:
-            print(f"HTTPS request failed: {e}")
\ No newline at end of file
+            success, detail = False, str(e)
+        return self._result(success, detail, self._timings(start, marks))
+
+    async def _check_response(self, check: HttpCheck, response: aiohttp.ClientResponse) -> tuple[bool, str]:
+        if check.expected_status is None:
+            if response.status >= 400:
+                return False, f"status {response.status}"
+        elif response.status not in check.expected_status:
+            return False, f"status {response.status} not in {check.expected_status}"
+
+        for header, expected in check.expected_headers.items():
+            value = response.headers.get(header)
+            if value is None:
+                return False, f"header {header} missing"
+            if expected not in value:
+                return False, f"header {header} does not contain '{expected}'"
+
+        if check.has_body_checks():
+            matcher = _BodyMatcher(check)
+            read = 0
+            async for chunk in response.content.iter_any():
+                chunk = chunk[:check.max_body_bytes - read]
+                read += len(chunk)
+                matcher.feed(chunk)
+                if matcher.decided() or read >= check.max_body_bytes:
+                    break
+            matcher.finish()
+            if not matcher.contains_found:
+                return False, f"body does not contain '{check.body_contains}' within {read} bytes"
+            if not matcher.regex_found:
+                return False, f"body does not match '{check.body_regex}' within {read} bytes"
+
+        return True, f"status {response.status}"
+
+    def _timings(self, start: float, marks: dict) -> ProbeTimings:
+        tls_start = marks.get("tls_start")
+        tls_end = marks.get("tls_end")
+        # the connection phase starts after name resolution and ends when the tls handshake starts (if any)
+        connect_start = marks.get("dns_end", marks.get("connect_start"))
+        connect_end = tls_start if tls_start is not None else marks.get("connect_end")
+        return ProbeTimings(
+            dns_ms=_ms(marks.get("dns_start"), marks.get("dns_end")),
+            connect_ms=_ms(connect_start, connect_end),
+            tls_ms=_ms(tls_start, tls_end),
+            ttfb_ms=_ms(marks.get("request_sent"), marks.get("response_start")),
+            total_ms=_ms(start, time.monotonic())
+        )
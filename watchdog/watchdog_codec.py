@@ -0,0 +1,35 @@
+from typing import List
+import logging, os
+
+from pydantic import TypeAdapter, ValidationError
+
+from .atomic_file import write_atomic
+from .data.watchdog import Watchdog
+
+class WatchdogCodec():
+    """Bulk (de)serialization of watchdog records: the whole record set is validated and dumped in a single pass."""
+
+    _adapter: TypeAdapter[List[Watchdog]] = TypeAdapter(List[Watchdog])
+
+    def decode(self, raw: bytes | str) -> List[Watchdog]:
+        if not raw:
+            return []
+        return self._adapter.validate_json(raw)
+
+    def encode(self, watchdogs: List[Watchdog]) -> bytes:
+        return self._adapter.dump_json(watchdogs)
+
+    def load(self, path: str) -> List[Watchdog]:
+        if not os.path.exists(path):
+            return []
+        with open(path, "rb") as f:
+            raw = f.read()
+        try:
+            return self.decode(raw)
+        except ValidationError as e:
+            # e.g. records stored before watchdogs were validated, they have to be fixed by hand
+            logging.error(f"Invalid watchdog records in {path}: {e}")
+            raise RuntimeError(f"Invalid watchdog records in {path}, fix or migrate the file") from e
+
+    def save(self, path: str, watchdogs: List[Watchdog]) -> None:
+        write_atomic(path, self.encode(watchdogs))